@@ -1,23 +1,45 @@
 import gym
 import numpy as np
-import random
+import tensorflow as tf
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import Dense
 from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.losses import MeanSquaredError
-from collections import deque
+from replay_buffer import ReplayBuffer, PrioritizedReplayBuffer
 
 # Define the DQN agent class
 class DQNAgent:
-    def __init__(self, state_size, action_size):
+    def __init__(self, state_size, action_size, memory_size=1000000, target_sync_steps=1000, tau=None,
+                 double_dqn=False, prioritized=False, alpha=0.6, beta=0.4, beta_increment=0.001):
         self.state_size = state_size
         self.action_size = action_size
-        self.memory = deque(maxlen=2000)
+        # Prioritized replay samples transitions by TD error, and corrects the bias this adds with
+        # importance-sampling weights, whose exponent beta grows to 1 over training
+        self.prioritized = prioritized
+        if prioritized:
+            self.memory = PrioritizedReplayBuffer(memory_size, state_size, alpha)
+        else:
+            self.memory = ReplayBuffer(memory_size, state_size)
+        self.beta = beta
+        self.beta_increment = beta_increment
         self.gamma = 0.95  # Discount factor
         self.epsilon = 1.0  # Exploration rate
         self.epsilon_min = 0.01
         self.epsilon_decay = 0.995
         self.model = self._build_model()
+        # Greedy actions of a batch of states in one compiled call, much cheaper than model.predict
+        self._greedy_actions = tf.function(
+            lambda states: tf.argmax(self.model(states, training=False), axis=1),
+            input_signature=[tf.TensorSpec([None, state_size], tf.float32)])
+        # Frozen copy of the model the targets are bootstrapped from. It is synced with the model
+        # every target_sync_steps replay steps, or moved towards it by tau after every step if set.
+        self.target_model = self._build_model()
+        self.target_model.set_weights(self.model.get_weights())
+        self.target_sync_steps = target_sync_steps
+        self.tau = tau
+        # Double DQN: the model picks the next action and the target model values it
+        self.double_dqn = double_dqn
+        self.train_steps = 0
 
     def _build_model(self):
         model = Sequential()
@@ -27,24 +49,58 @@ class DQNAgent:
         model.compile(optimizer=Adam(), loss=MeanSquaredError())
         return model
 
+    def update_target_model(self, tau=1.0):
+        if tau == 1.0:
+            self.target_model.set_weights(self.model.get_weights())
+        else:
+            for weight, target_weight in zip(self.model.weights, self.target_model.weights):
+                target_weight.assign(tau * weight + (1 - tau) * target_weight)
+
     def remember(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))
+        self.memory.add(state, action, reward, next_state, done)
 
     def act(self, state):
         if np.random.rand() <= self.epsilon:
             return np.random.randint(self.action_size)
-        q_values = self.model.predict(state)
-        return np.argmax(q_values[0])
+        states = np.asarray(state, dtype=np.float32).reshape(1, self.state_size)
+        return int(self._greedy_actions(states)[0])
+
+    def act_batch(self, states):
+        states = np.asarray(states, dtype=np.float32).reshape(-1, self.state_size)
+        actions = self._greedy_actions(states).numpy()
+        # Every state explores on its own with probability epsilon
+        explore = np.random.rand(len(actions)) <= self.epsilon
+        actions[explore] = np.random.randint(self.action_size, size=explore.sum())
+        return actions
 
     def replay(self, batch_size):
-        minibatch = np.array(random.sample(self.memory, batch_size))
-        for state, action, reward, next_state, done in minibatch:
-            target = reward
-            if not done:
-                target = reward + self.gamma * np.amax(self.model.predict(next_state)[0])
-            target_f = self.model.predict(state)
-            target_f[0][action] = target
-            self.model.fit(state, target_f, epochs=1, verbose=0)
+        if self.prioritized:
+            states, actions, rewards, next_states, dones, idx, weights = self.memory.sample(batch_size, self.beta)
+            self.beta = min(1.0, self.beta + self.beta_increment)
+        else:
+            states, actions, rewards, next_states, dones = self.memory.sample(batch_size)
+            weights = None
+        next_target_q = np.asarray(self.target_model.predict_on_batch(next_states))
+        if self.double_dqn:
+            # One forward pass over the states and the next states together
+            q_values = np.asarray(self.model.predict_on_batch(np.concatenate([states, next_states])))
+            target_f, next_q_values = q_values[:batch_size], q_values[batch_size:]
+            next_values = next_target_q[np.arange(batch_size), np.argmax(next_q_values, axis=1)]
+        else:
+            target_f = np.asarray(self.model.predict_on_batch(states))
+            next_values = np.amax(next_target_q, axis=1)
+        targets = rewards + self.gamma * next_values * ~dones
+        td_errors = targets - target_f[np.arange(batch_size), actions]
+        target_f[np.arange(batch_size), actions] = targets
+        self.model.train_on_batch(states, target_f, sample_weight=weights)
+        if self.prioritized:
+            self.memory.update_priorities(idx, td_errors)
+
+        self.train_steps += 1
+        if self.tau is not None:
+            self.update_target_model(self.tau)
+        elif self.train_steps % self.target_sync_steps == 0:
+            self.update_target_model()
         if self.epsilon > self.epsilon_min:
             self.epsilon *= self.epsilon_decay
 
@@ -0,0 +1,126 @@
+import numpy as np
+
+
+class ReplayBuffer:
+    """
+    Circular buffer of transitions stored in preallocated NumPy arrays. Once it is full, new
+    transitions overwrite the oldest ones, so its memory use is fixed by the capacity.
+    """
+    def __init__(self, capacity, state_size, seed=None):
+        self.capacity = capacity
+        self.states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_size), dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=np.bool_)
+        self.ptr = 0  # where the next transition goes
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.states, self.actions, self.rewards, self.next_states, self.dones))
+
+    def add(self, state, action, reward, next_state, done):
+        # States may come with a batch dimension of 1, as they are fed to the model
+        self.states[self.ptr] = np.reshape(state, -1)
+        self.actions[self.ptr] = action
+        self.rewards[self.ptr] = reward
+        self.next_states[self.ptr] = np.reshape(next_state, -1)
+        self.dones[self.ptr] = done
+        self.ptr = (self.ptr + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, batch_size):
+        """
+        Sample batch_size transitions uniformly, with replacement.
+        Returns the arrays (states, actions, rewards, next_states, dones) of the batch.
+        """
+        idx = self.rng.integers(0, self.size, size=batch_size)
+        return self.states[idx], self.actions[idx], self.rewards[idx], self.next_states[idx], self.dones[idx]
+
+
+class SumTree:
+    """
+    Binary tree of priorities in a flat array, where every node holds the sum of its two
+    children: node i has children 2i and 2i + 1, the root is node 1 and the leaves hold the
+    priorities of the slots. Updates and sampling take O(log n) and work on whole batches.
+    """
+    def __init__(self, capacity):
+        self.leaves = 1 << max(capacity - 1, 0).bit_length()  # capacity rounded up to a power of two
+        self.nodes = np.zeros(2 * self.leaves, dtype=np.float64)
+
+    @property
+    def total(self):
+        return self.nodes[1]
+
+    def get(self, idx):
+        return self.nodes[self.leaves + np.asarray(idx)]
+
+    def update(self, idx, priorities):
+        nodes = self.leaves + np.asarray(idx)
+        self.nodes[nodes] = priorities
+        # Recompute the sums on the way up, one level at a time
+        while nodes[0] > 1:
+            nodes = np.unique(nodes // 2)
+            self.nodes[nodes] = self.nodes[2 * nodes] + self.nodes[2 * nodes + 1]
+
+    def find(self, values):
+        """
+        Return the slot of every value in [0, total), walking down from the root to the leaf
+        whose range of the cumulative sum of priorities contains it.
+        """
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        while nodes[0] < self.leaves:
+            left_sums = self.nodes[2 * nodes]
+            right = values >= left_sums
+            values -= left_sums * right
+            nodes = 2 * nodes + right
+        return nodes - self.leaves
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    Replay buffer that samples transitions in proportion to priority ** alpha, the priority
+    being the absolute TD error of their last update. New transitions get the highest priority
+    seen so far, so they are replayed at least once.
+    """
+    def __init__(self, capacity, state_size, alpha=0.6, eps=1e-6, seed=None):
+        super().__init__(capacity, state_size, seed)
+        self.alpha = alpha
+        self.eps = eps  # keeps transitions with no TD error sampleable
+        self.max_priority = 1.0
+        self.tree = SumTree(capacity)
+
+    def add(self, state, action, reward, next_state, done):
+        self.tree.update([self.ptr], [self.max_priority ** self.alpha])
+        super().add(state, action, reward, next_state, done)
+
+    def sample(self, batch_size, beta=0.4):
+        """
+        Sample batch_size transitions, one from each of batch_size equal segments of the total
+        priority. Returns the arrays (states, actions, rewards, next_states, dones) of the batch,
+        their slots, to update their priorities later, and their importance-sampling weights,
+        (N * P(i)) ** -beta scaled so the largest of the batch is 1.
+        """
+        total = self.tree.total
+        segment = total / batch_size
+        values = (np.arange(batch_size) + self.rng.random(batch_size)) * segment
+        # Rounding can push a value to the end of the tree, past the last transition
+        values = np.minimum(values, np.nextafter(total, 0))
+        idx = np.minimum(self.tree.find(values), self.size - 1)
+
+        probs = self.tree.get(idx) / total
+        weights = (self.size * probs) ** -beta
+        weights /= weights.max()
+        return (self.states[idx], self.actions[idx], self.rewards[idx], self.next_states[idx], self.dones[idx],
+                idx, weights.astype(np.float32))
+
+    def update_priorities(self, idx, td_errors):
+        priorities = np.abs(td_errors) + self.eps
+        self.max_priority = max(self.max_priority, priorities.max())
+        self.tree.update(idx, priorities ** self.alpha)
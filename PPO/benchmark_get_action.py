@@ -0,0 +1,95 @@
+"""
+	This file measures the per-step latency of PPO.get_action against the original
+	implementation, which built a MultivariateNormal from the covariance matrix on every call.
+	Run it with: python benchmark_get_action.py [--steps 5000] [--num_envs 1]
+"""
+
+import argparse
+import time
+
+import gymnasium as gym
+import numpy as np
+import torch
+from torch.distributions import MultivariateNormal
+
+from network import FeedForwardNN
+from ppo import PPO
+
+def legacy_get_action(model, cov_mat, obs):
+	"""
+		The original PPO.get_action, kept here as the reference implementation.
+
+		Parameters:
+			model - the PPO model whose actor to query
+			cov_mat - the fixed covariance matrix of the actions
+			obs - the observation at the current timestep
+
+		Return:
+			action - the action to take, as a numpy array
+			log_prob - the log probability of the selected action in the distribution
+	"""
+	mean = model.actor(obs)
+	dist = MultivariateNormal(mean, cov_mat)
+	action = dist.sample()
+	log_prob = dist.log_prob(action)
+	return action.detach().numpy(), log_prob.detach()
+
+def time_per_step(get_action, obs, steps):
+	"""
+		Measure the average latency of get_action.
+
+		Parameters:
+			get_action - function taking an observation and returning an action and its log prob
+			obs - the observation to query with
+			steps - the number of calls to average over
+
+		Return:
+			latency - the average time per call, in microseconds
+	"""
+	# Warm up first so one-time allocations aren't measured
+	for _ in range(100):
+		get_action(obs)
+
+	start = time.perf_counter()
+	for _ in range(steps):
+		get_action(obs)
+	return (time.perf_counter() - start) / steps * 1e6
+
+def main(args):
+	"""
+		Time both implementations and check they agree on the log probabilities.
+
+		Parameters:
+			args - the arguments parsed from command line
+
+		Return:
+			None
+	"""
+	torch.set_num_threads(1)
+
+	env = gym.make('Pendulum-v1')
+	model = PPO(policy_class=FeedForwardNN, env=env, render=False)
+	cov_mat = torch.diag(torch.full(size=(model.act_dim,), fill_value=0.5))
+
+	obs, _ = env.reset(seed=0)
+	if args.num_envs > 1:
+		obs = np.stack([obs] * args.num_envs)
+
+	# Both distributions must give the same log probability to the same action
+	action, log_prob = model.get_action(obs)
+	mean = model.actor(obs).detach()
+	legacy_log_prob = MultivariateNormal(mean, cov_mat).log_prob(torch.from_numpy(action))
+	assert torch.allclose(log_prob, legacy_log_prob, atol=1e-5), "Log probabilities don't match"
+
+	legacy = time_per_step(lambda o: legacy_get_action(model, cov_mat, o), obs, args.steps)
+	current = time_per_step(model.get_action, obs, args.steps)
+
+	print(f"get_action latency over {args.steps} steps with {args.num_envs} env(s):", flush=True)
+	print(f"MultivariateNormal: {legacy:.1f} us/step", flush=True)
+	print(f"Diagonal Gaussian:  {current:.1f} us/step ({legacy / current:.1f}x faster)", flush=True)
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser()
+	parser.add_argument('--steps', dest='steps', type=int, default=5000)
+	parser.add_argument('--num_envs', dest='num_envs', type=int, default=1)
+	main(parser.parse_args())
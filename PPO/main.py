@@ -4,6 +4,7 @@
 """
 
 import gymnasium as gym
+import os
 import sys
 import torch
 
@@ -35,6 +36,12 @@ def train(env, hyperparameters, actor_model, critic_model):
 		print(f"Loading in {actor_model} and {critic_model}...", flush=True)
 		model.actor.load_state_dict(torch.load(actor_model))
 		model.critic.load_state_dict(torch.load(critic_model))
+		# The action std is saved next to the actor, and only changes during training with learn_std
+		log_std_model = os.path.join(os.path.dirname(actor_model), 'ppo_log_std.pth')
+		if os.path.exists(log_std_model):
+			with torch.no_grad():
+				model.policy.log_std.copy_(torch.load(log_std_model))
+			print(f"Loaded the action std from {log_std_model}.", flush=True)
 		print(f"Successfully loaded.", flush=True)
 	elif actor_model != '' or critic_model != '': # Don't train from scratch if user accidentally forgets actor/critic model
 		print(f"Error: Either specify both actor/critic models or none at all. We don't want to accidentally override anything!")
@@ -98,6 +105,7 @@ def main(args):
 				'timesteps_per_batch': 2048, 
 				'max_timesteps_per_episode': 200, 
 				'gamma': 0.99, 
+				'gae_lambda': 0.95,
 				'n_updates_per_iteration': 10,
 				'lr': 3e-4, 
 				'clip': 0.2,
@@ -39,12 +39,55 @@ class FeedForwardNN(nn.Module):
 			Return:
 				output - the output of our forward pass
 		"""
-		# Convert observation to tensor if it's a numpy array
+		# Convert observation to tensor if it's a numpy array. float32 arrays are wrapped without a copy
 		if isinstance(obs, np.ndarray):
-			obs = torch.tensor(obs, dtype=torch.float)
+			obs = torch.from_numpy(np.asarray(obs, dtype=np.float32))
 
 		activation1 = F.relu(self.layer1(obs))
 		activation2 = F.relu(self.layer2(activation1))
 		output = self.layer3(activation2)
 
-		return output
\ No newline at end of file
+		return output
+
+class ActorCritic(nn.Module):
+	"""
+		The actor and critic networks held in one module with two heads, so that both
+		can be trained from a single combined loss with one backward pass and one optimizer step.
+		The heads are kept as the actor and critic attributes, so each of them still saves to
+		and loads from its own ppo_actor.pth / ppo_critic.pth checkpoint. The module also holds
+		the per-dimension log standard deviation of the diagonal Gaussian policy.
+	"""
+	def __init__(self, obs_dim, act_dim, policy_class=FeedForwardNN, init_var=0.5, learn_std=False):
+		"""
+			Initialize the actor and critic heads.
+
+			Parameters:
+				obs_dim - observation dimensions as an int
+				act_dim - action dimensions as an int
+				policy_class - the network class to use for each head
+				init_var - the initial variance of each action dimension
+				learn_std - whether the log standard deviation is trained along with the heads
+
+			Return:
+				None
+		"""
+		super(ActorCritic, self).__init__()
+
+		self.actor = policy_class(obs_dim, act_dim)
+		self.critic = policy_class(obs_dim, 1)
+
+		# log(std) = log(var) / 2. Left out of the gradient steps unless it should be learned
+		self.log_std = nn.Parameter(torch.full((act_dim,), 0.5 * np.log(init_var)), requires_grad=learn_std)
+
+	def forward(self, obs):
+		"""
+			Runs a forward pass through both heads.
+
+			Parameters:
+				obs - observation to pass as input
+
+			Return:
+				mean - the mean action from the actor
+				V - the value from the critic, with its last dimension squeezed
+		"""
+		return self.actor(obs), self.critic(obs).squeeze(-1)
@@ -4,15 +4,24 @@
 			It can be found here: https://spinningup.openai.com/en/latest/_images/math/e62a8971472597f4b014c2da064f636ffe365ba3.svg
 """
 
+import copy
 import gymnasium as gym
+import itertools
+import queue
+import threading
 import time
+from functools import partial
 
 import numpy as np
 import time
 import torch
 import torch.nn as nn
 from torch.optim import Adam
-from torch.distributions import MultivariateNormal
+
+from returns import compute_gae
+from network import ActorCritic
+from rollout_buffer import RolloutBuffer
+from workers import EnvWorkerPool
 
 class PPO:
 	"""
@@ -42,17 +51,41 @@ class PPO:
 		self.obs_dim = env.observation_space.shape[0]
 		self.act_dim = env.action_space.shape[0]
 
-		 # Initialize actor and critic networks
-		self.actor = policy_class(self.obs_dim, self.act_dim)                                                   # ALG STEP 1
-		self.critic = policy_class(self.obs_dim, 1)
-
-		# Initialize optimizers for actor and critic
-		self.actor_optim = Adam(self.actor.parameters(), lr=self.lr)
-		self.critic_optim = Adam(self.critic.parameters(), lr=self.lr)
-
-		# Initialize the covariance matrix used to query the actor for actions
-		self.cov_var = torch.full(size=(self.act_dim,), fill_value=0.5)
-		self.cov_mat = torch.diag(self.cov_var)
+		# Build copies of env that are stepped in lockstep, if a vectorized rollout was requested
+		self.vec_env = self._make_vec_env(env) if self.vector_mode is not None else None
+
+		# State of the episodes running in self.vec_env, carried from one rollout to the next
+		# so episodes don't restart at every batch. Set on the first rollout
+		self.vec_obs = None
+		self.vec_ep_lens = None
+		self.vec_ep_rets = None
+
+		# Preallocate the storage for a batch. Without a vector env, rollout may run past
+		# timesteps_per_batch by up to one episode, since it always finishes the last one.
+		# When pipelined, up to max_policy_lag batches wait to be learned from while the next one is collected
+		if self.vec_env is not None:
+			buffer_shape = (-(-self.timesteps_per_batch // self.num_envs), self.num_envs)
+		else:
+			buffer_shape = (self.timesteps_per_batch + self.max_timesteps_per_episode - 1, 1)
+		self.buffers = [RolloutBuffer(*buffer_shape, self.obs_dim, self.act_dim) for _ in range(self.max_policy_lag + 1)]
+		self.buffer = self.buffers[0]
+
+		 # Initialize actor and critic networks, as the two heads of a single module
+		self.policy = ActorCritic(self.obs_dim, self.act_dim, policy_class, learn_std=self.learn_std)           # ALG STEP 1
+		self.actor = self.policy.actor
+		self.critic = self.policy.critic
+
+		# The networks rollout acts with. When pipelined, this is a snapshot of self.policy taken at the
+		# start of each rollout, so the learner can keep updating self.policy in the meantime
+		self.rollout_policy = copy.deepcopy(self.policy) if self.max_policy_lag > 0 else self.policy
+
+		# Preallocate the tensor observations are copied into when querying the actor during rollout,
+		# shaped like what self.env or self.vec_env returns
+		self.obs_tensor = torch.zeros((self.num_envs, self.obs_dim) if self.vec_env is not None else (self.obs_dim,))
+
+		# Initialize a single optimizer for actor and critic. Adam scales each parameter's update on its own,
+		# and the heads share no parameters, so this takes the same steps as one optimizer per head
+		self.optim = Adam(self.policy.parameters(), lr=self.lr)
 
 		# This logger will help us with printing out summaries of each iteration
 		self.logger = {
@@ -76,25 +109,49 @@ class PPO:
 		"""
 		print(f"Learning... Running {self.max_timesteps_per_episode} timesteps per episode, ", end='')
 		print(f"{self.timesteps_per_batch} timesteps per batch for a total of {total_timesteps} timesteps")
+
+		# Start collecting batches in the background, if pipelined
+		if self.max_policy_lag > 0:
+			self._start_pipeline()
+
+		try:
+			self._learn(total_timesteps)
+		finally:
+			if self.max_policy_lag > 0:
+				self._stop_pipeline()
+
+	def _learn(self, total_timesteps):
+		"""
+			The training loop of learn.
+
+			Parameters:
+				total_timesteps - the total number of timesteps to train for
+
+			Return:
+				None
+		"""
 		t_so_far = 0 # Timesteps simulated so far
 		i_so_far = 0 # Iterations ran so far
 		while t_so_far < total_timesteps:                                                                       # ALG STEP 2
 			# Autobots, roll out (just kidding, we're collecting our batch simulations here)
-			batch_obs, batch_acts, batch_log_probs, batch_rtgs, batch_lens = self.rollout()                     # ALG STEP 3
+			buffer, (batch_obs, batch_acts, batch_log_probs, batch_rtgs, batch_lens) = self._next_batch()      # ALG STEP 3
 
 			# Calculate how many timesteps we collected this batch
-			t_so_far += np.sum(batch_lens)
+			t_so_far += len(batch_obs)
 
 			# Increment the number of iterations
 			i_so_far += 1
 
-			# Logging timesteps so far and iterations so far
+			# Logging timesteps so far, iterations so far, and the episodic returns and episodic lengths in this batch
 			self.logger['t_so_far'] = t_so_far
 			self.logger['i_so_far'] = i_so_far
+			self.logger['batch_rews'] = buffer.ep_rets
+			self.logger['batch_lens'] = batch_lens
 
-			# Calculate advantage at k-th iteration
-			V, _ = self.evaluate(batch_obs, batch_acts)
-			A_k = batch_rtgs - V.detach()                                                                       # ALG STEP 5
+			# Calculate advantage at k-th iteration. Since batch_rtgs are lambda-returns, subtracting the values
+			# the critic gave during rollout gives back the GAE advantages
+			V = buffer.flat(buffer.values)
+			A_k = batch_rtgs - V                                                                               # ALG STEP 5
 
 			# One of the only tricks I use that isn't in the pseudocode. Normalizing advantages
 			# isn't theoretically necessary, but in practice it decreases the variance of 
@@ -104,41 +161,13 @@ class PPO:
 
 			# This is the loop where we update our network for some n epochs
 			for _ in range(self.n_updates_per_iteration):                                                       # ALG STEP 6 & 7
-				# Calculate V_phi and pi_theta(a_t | s_t)
-				V, curr_log_probs = self.evaluate(batch_obs, batch_acts)
-
-				# Calculate the ratio pi_theta(a_t | s_t) / pi_theta_k(a_t | s_t)
-				# NOTE: we just subtract the logs, which is the same as
-				# dividing the values and then canceling the log with e^log.
-				# For why we use log probabilities instead of actual probabilities,
-				# here's a great explanation: 
-				# https://cs.stackexchange.com/questions/70518/why-do-we-use-the-log-in-gradient-based-reinforcement-algorithms
-				# TL;DR makes gradient ascent easier behind the scenes.
-				ratios = torch.exp(curr_log_probs - batch_log_probs)
-
-				# Calculate surrogate losses.
-				surr1 = ratios * A_k
-				surr2 = torch.clamp(ratios, 1 - self.clip, 1 + self.clip) * A_k
-
-				# Calculate actor and critic losses.
-				# NOTE: we take the negative min of the surrogate losses because we're trying to maximize
-				# the performance function, but Adam minimizes the loss. So minimizing the negative
-				# performance function maximizes it.
-				actor_loss = (-torch.min(surr1, surr2)).mean()
-				critic_loss = nn.MSELoss()(V, batch_rtgs)
-
-				# Calculate gradients and perform backward propagation for actor network
-				self.actor_optim.zero_grad()
-				actor_loss.backward(retain_graph=True)
-				self.actor_optim.step()
-
-				# Calculate gradients and perform backward propagation for critic network
-				self.critic_optim.zero_grad()
-				critic_loss.backward()
-				self.critic_optim.step()
-
-				# Log actor loss
-				self.logger['actor_losses'].append(actor_loss.detach())
+				# Each epoch goes over the whole batch in a new random order, one minibatch per update
+				for idx in self._minibatches(len(batch_obs)):
+					self._update(batch_obs[idx], batch_acts[idx], batch_log_probs[idx], batch_rtgs[idx], A_k[idx])
+
+			# Let the background rollouts act with the updated networks
+			if self.max_policy_lag > 0:
+				self._publish_policy()
 
 			# Print a summary of our training so far
 			self._log_summary()
@@ -147,12 +176,182 @@ class PPO:
 			if i_so_far % self.save_freq == 0:
 				torch.save(self.actor.state_dict(), './ppo_actor.pth')
 				torch.save(self.critic.state_dict(), './ppo_critic.pth')
+				# Kept out of ppo_actor.pth, which test loads into a plain FeedForwardNN
+				torch.save(self.policy.log_std.detach(), './ppo_log_std.pth')
+
+	def _next_batch(self):
+		"""
+			Get the next batch to learn from, either by running rollout or, when pipelined,
+			from the batches collected in the background.
+
+			Parameters:
+				None
+
+			Return:
+				buffer - the RolloutBuffer holding the batch
+				batch - what rollout returned for the batch
+		"""
+		if self.max_policy_lag == 0:
+			return self.buffer, self.rollout()
+
+		batch = self.batches.get()
+		if isinstance(batch, Exception):
+			raise batch
+		return batch
+
+	def _start_pipeline(self):
+		"""
+			Start a thread that keeps running rollout while learn updates the networks, with
+			a snapshot of the policy weights that is at most max_policy_lag iterations old.
+			Batch k is only started once the learner has finished iteration k - max_policy_lag,
+			so each batch is learned from by a policy at most that many updates ahead of the one
+			that collected it, which PPO's clipped ratio already accounts for.
+
+			Parameters:
+				None
+
+			Return:
+				None
+		"""
+		self.batches = queue.Queue()
+		self.pipeline_cond = threading.Condition()
+		self.pipeline_stop = False
+		self.policy_version = 0
+		self._publish_policy(increment=False)
+
+		self.pipeline_thread = threading.Thread(target=self._collect, daemon=True)
+		self.pipeline_thread.start()
+
+	def _collect(self):
+		"""
+			The loop of the rollout thread started by _start_pipeline. Batches go round robin
+			through self.buffers, which is safe since a buffer is only reused once the learner
+			is done with the batch it held.
+
+			Parameters:
+				None
+
+			Return:
+				None
+		"""
+		try:
+			for k in itertools.count():
+				with self.pipeline_cond:
+					self.pipeline_cond.wait_for(lambda: self.pipeline_stop or self.policy_version >= k - self.max_policy_lag)
+					if self.pipeline_stop:
+						return
+					self.rollout_policy.load_state_dict(self.policy_weights)
+
+				self.buffer = self.buffers[k % len(self.buffers)]
+				self.batches.put((self.buffer, self.rollout()))
+		except Exception as e:
+			# Raise the error in the learner, instead of letting it wait for a batch forever
+			self.batches.put(e)
+
+	def _publish_policy(self, increment=True):
+		"""
+			Copy the current weights for the rollout thread to act with.
+
+			Parameters:
+				increment - whether the learner just finished an iteration
+
+			Return:
+				None
+		"""
+		weights = {k: v.detach().clone() for k, v in self.policy.state_dict().items()}
+		with self.pipeline_cond:
+			self.policy_weights = weights
+			self.policy_version += increment
+			self.pipeline_cond.notify_all()
+
+	def _stop_pipeline(self):
+		"""
+			Stop the rollout thread, letting it finish the batch it is collecting.
+
+			Parameters:
+				None
+
+			Return:
+				None
+		"""
+		with self.pipeline_cond:
+			self.pipeline_stop = True
+			self.pipeline_cond.notify_all()
+		self.pipeline_thread.join()
+
+	def _minibatches(self, batch_size):
+		"""
+			Split the timesteps of a batch into shuffled minibatches of minibatch_size timesteps.
+
+			Parameters:
+				batch_size - number of timesteps in the batch
+
+			Return:
+				A generator of indices into the batch, one per minibatch. If minibatch_size is None
+				or covers the batch, the whole batch is a single minibatch indexed by a slice, so
+				that indexing returns views rather than gathering a copy.
+		"""
+		if self.minibatch_size is None or self.minibatch_size >= batch_size:
+			yield slice(None)
+			return
+
+		# Only the indices are shuffled; each minibatch gathers just its own rows from the batch
+		perm = torch.randperm(batch_size)
+		for start in range(0, batch_size, self.minibatch_size):
+			yield perm[start:start + self.minibatch_size]
+
+	def _update(self, batch_obs, batch_acts, batch_log_probs, batch_rtgs, A_k):
+		"""
+			Perform one gradient step of the actor and the critic on a minibatch.
+
+			Parameters:
+				batch_obs - the observations of the minibatch. Shape: (minibatch size, dimension of observation)
+				batch_acts - the actions of the minibatch. Shape: (minibatch size, dimension of action)
+				batch_log_probs - the log probabilities of those actions when they were taken. Shape: (minibatch size)
+				batch_rtgs - the critic targets of the minibatch. Shape: (minibatch size)
+				A_k - the normalized advantages of the minibatch. Shape: (minibatch size)
+
+			Return:
+				None
+		"""
+		# Calculate V_phi and pi_theta(a_t | s_t)
+		V, curr_log_probs = self.evaluate(batch_obs, batch_acts)
+
+		# Calculate the ratio pi_theta(a_t | s_t) / pi_theta_k(a_t | s_t)
+		# NOTE: we just subtract the logs, which is the same as
+		# dividing the values and then canceling the log with e^log.
+		# For why we use log probabilities instead of actual probabilities,
+		# here's a great explanation: 
+		# https://cs.stackexchange.com/questions/70518/why-do-we-use-the-log-in-gradient-based-reinforcement-algorithms
+		# TL;DR makes gradient ascent easier behind the scenes.
+		ratios = torch.exp(curr_log_probs - batch_log_probs)
+
+		# Calculate surrogate losses.
+		surr1 = ratios * A_k
+		surr2 = torch.clamp(ratios, 1 - self.clip, 1 + self.clip) * A_k
+
+		# Calculate actor and critic losses.
+		# NOTE: we take the negative min of the surrogate losses because we're trying to maximize
+		# the performance function, but Adam minimizes the loss. So minimizing the negative
+		# performance function maximizes it.
+		actor_loss = (-torch.min(surr1, surr2)).mean()
+		critic_loss = nn.MSELoss()(V, batch_rtgs)
+
+		# Calculate gradients and perform backward propagation for both networks at once. Each loss only
+		# reaches the parameters of its own head, so summing them gives each head its own gradients
+		self.optim.zero_grad()
+		(actor_loss + critic_loss).backward()
+		self.optim.step()
+
+		# Log actor loss
+		self.logger['actor_losses'].append(actor_loss.detach())
 
 	def rollout(self):
 		"""
 			Too many transformers references, I'm sorry. This is where we collect the batch of data
 			from simulation. Since this is an on-policy algorithm, we'll need to collect a fresh batch
-			of data each time we iterate the actor/critic networks.
+			of data each time we iterate the actor/critic networks. The data is written in place
+			into self.buffer, and the returned tensors share memory with it.
 
 			Parameters:
 				None
@@ -161,26 +360,23 @@ class PPO:
 				batch_obs - the observations collected this batch. Shape: (number of timesteps, dimension of observation)
 				batch_acts - the actions collected this batch. Shape: (number of timesteps, dimension of action)
 				batch_log_probs - the log probabilities of each action taken this batch. Shape: (number of timesteps)
-				batch_rtgs - the Rewards-To-Go of each timestep in this batch. Shape: (number of timesteps)
+				batch_rtgs - the lambda-returns of each timestep in this batch, i.e. their GAE advantages plus
+							their values. Shape: (number of timesteps)
 				batch_lens - the lengths of each episode this batch. Shape: (number of episodes)
 		"""
-		# Batch data. For more details, check function header.
-		batch_obs = []
-		batch_acts = []
-		batch_log_probs = []
-		batch_rews = []
-		batch_rtgs = []
-		batch_lens = []
+		# Step all the vectorized copies of the environment at once if we have them
+		if self.vec_env is not None:
+			return self._rollout_vectorized()
 
-		# Episodic data. Keeps track of rewards per episode, will get cleared
-		# upon each new episode
-		ep_rews = []
+		self.buffer.reset()
 
-		t = 0 # Keeps track of how many timesteps we've run so far this batch
+		# Episodic lengths and returns in this batch
+		batch_lens = []
+		batch_rews = []
 
 		# Keep simulating until we've run more than or equal to specified timesteps per batch
-		while t < self.timesteps_per_batch:
-			ep_rews = [] # rewards collected per episode
+		while self.buffer.ptr < self.timesteps_per_batch:
+			ep_ret = 0 # return collected this episode
 
 			# Reset the environment. sNote that obs is short for observation. 
 			obs, _ = self.env.reset()
@@ -192,23 +388,23 @@ class PPO:
 				if self.render and (self.logger['i_so_far'] % self.render_every_i == 0) and len(batch_lens) == 0:
 					self.env.render()
 
-				t += 1 # Increment timesteps ran this batch so far
-
-				# Track observations in this batch
-				batch_obs.append(obs)
-
 				# Calculate action and make a step in the env. 
 				# Note that rew is short for reward.
 				action, log_prob = self.get_action(obs)
-				obs, rew, terminated, truncated, _ = self.env.step(action)
+				next_obs, rew, terminated, truncated, _ = self.env.step(action)
 
-				# Don't really care about the difference between terminated or truncated in this, so just combine them
-				done = terminated | truncated
+				# An episode ends when it is terminated, truncated, or runs out of timesteps
+				done = terminated | truncated | (ep_t == self.max_timesteps_per_episode - 1)
 
-				# Track recent reward, action, and action log probability
-				ep_rews.append(rew)
-				batch_acts.append(action)
-				batch_log_probs.append(log_prob)
+				# Track observation, action, action log probability, reward and end of episode
+				self.buffer.add(obs, action, log_prob, rew, done)
+
+				# Only a terminated episode has no future rewards. One cut short by a time limit would have
+				# continued, so its return is bootstrapped from the critic's value of where it stopped
+				if done and not terminated:
+					self.buffer.bootstrap_values[0, self.buffer.ptr - 1] = self._value(next_obs)
+				obs = next_obs
+				ep_ret += rew
 
 				# If the environment tells us the episode is terminated, break
 				if done:
@@ -216,50 +412,168 @@ class PPO:
 
 			# Track episodic lengths and rewards
 			batch_lens.append(ep_t + 1)
-			batch_rews.append(ep_rews)
+			batch_rews.append(ep_ret)
+
+		return self._finish_rollout(batch_lens, batch_rews)
+
+	def _rollout_vectorized(self):
+		"""
+			Same as rollout, but drives num_envs copies of the environment in lockstep through
+			self.vec_env, so each timestep needs a single batched forward pass of the actor.
+			Every env runs ceil(timesteps_per_batch / num_envs) steps. An episode still running
+			when the batch ends is cut there for computing returns, bootstrapped from the critic,
+			and carries on in the next batch.
+
+			Parameters:
+				None
 
-		# Reshape data as tensors in the shape specified in function description, before returning
-		batch_obs = torch.tensor(batch_obs, dtype=torch.float)
-		batch_acts = torch.tensor(batch_acts, dtype=torch.float)
-		batch_log_probs = torch.tensor(batch_log_probs, dtype=torch.float)
-		batch_rtgs = self.compute_rtgs(batch_rews)                                                              # ALG STEP 4
+			Return:
+				Same as rollout, except that batch_lens only holds the episodes that ended this batch,
+				with their full lengths, including timesteps collected in earlier batches.
+		"""
+		n_envs = self.num_envs
+		self.buffer.reset()
+
+		# Episodic data of the episodes ending this batch, kept per env
+		env_lens = [[] for _ in range(n_envs)]
+		env_rews = [[] for _ in range(n_envs)]
+
+		# The vectorized env resets each copy on its own as soon as its episode is done, so it only
+		# needs to be reset once, before the first batch
+		if self.vec_obs is None:
+			self.vec_obs, _ = self.vec_env.reset()
+			self.vec_ep_lens = np.zeros(n_envs, dtype=int)
+			self.vec_ep_rets = np.zeros(n_envs)
+		obs = self.vec_obs
+		ep_lens = self.vec_ep_lens
+		ep_rets = self.vec_ep_rets
+
+		while self.buffer.ptr < self.buffer.n_steps:
+			# One forward pass of the actor for all the envs
+			action, log_prob = self.get_action(obs)
+			next_obs, rew, terminated, truncated, info = self.vec_env.step(action)
+
+			# Episodes still running when the batch ends are cut on its last timestep
+			ended = terminated | truncated
+			done = ended | (self.buffer.ptr == self.buffer.n_steps - 1)
+
+			self.buffer.add(obs, action, log_prob, rew, done)
+
+			# Bootstrap the episodes that were cut short rather than terminated, as in rollout. Truncated
+			# envs were already reset, so their last observation comes from info
+			cut = done & ~terminated
+			if cut.any():
+				final_obs = next_obs.copy()
+				for i in np.flatnonzero(info.get('_final_obs', [])):
+					final_obs[i] = info['final_obs'][i]
+				self.buffer.bootstrap_values[cut, self.buffer.ptr - 1] = self._value(final_obs[cut])
+			obs = next_obs
+			ep_lens += 1
+			ep_rets += rew
+
+			for i in np.flatnonzero(ended):
+				env_lens[i].append(ep_lens[i])
+				env_rews[i].append(ep_rets[i])
+			ep_lens[ended] = 0
+			ep_rets[ended] = 0
+
+		self.vec_obs = obs
+
+		batch_lens = [int(ep_len) for lens in env_lens for ep_len in lens]
+		batch_rews = [float(ep_ret) for rets in env_rews for ep_ret in rets]
+
+		return self._finish_rollout(batch_lens, batch_rews)
+
+	def _finish_rollout(self, batch_lens, batch_rews):
+		"""
+			Compute what is left of the batch once self.buffer is filled, and log its episodes.
 
-		# Log the episodic returns and episodic lengths in this batch.
-		self.logger['batch_rews'] = batch_rews
-		self.logger['batch_lens'] = batch_lens
+			Parameters:
+				batch_lens - the lengths of each episode this batch. Shape: (number of episodes)
+				batch_rews - the returns of each episode this batch. Shape: (number of episodes)
+
+			Return:
+				Same as rollout.
+		"""
+		batch_obs = self.buffer.flat(self.buffer.obs)
+		batch_acts = self.buffer.flat(self.buffer.acts)
+		batch_log_probs = self.buffer.flat(self.buffer.log_probs)
+
+		# Query the critic once for the value of every observation in the batch
+		with torch.inference_mode():
+			self.buffer.flat(self.buffer.values)[:] = self.rollout_policy.critic(batch_obs).squeeze(-1)
+
+		batch_rtgs = self.compute_returns()                                                                     # ALG STEP 4
+
+		# Keep the episodic returns with the batch, for learn to log
+		self.buffer.ep_rets = batch_rews
 
 		return batch_obs, batch_acts, batch_log_probs, batch_rtgs, batch_lens
 
-	def compute_rtgs(self, batch_rews):
+	def _make_vec_env(self, env):
 		"""
-			Compute the Reward-To-Go of each timestep in a batch given the rewards.
+			Create num_envs fresh copies of env stepped in lockstep.
 
 			Parameters:
-				batch_rews - the rewards in a batch, Shape: (number of episodes, number of timesteps per episode)
+				env - the environment to copy, must have been created with gym.make
 
 			Return:
-				batch_rtgs - the rewards to go, Shape: (number of timesteps in batch)
+				vec_env - a SyncVectorEnv or AsyncVectorEnv, or an EnvWorkerPool, depending on vector_mode
+		"""
+		assert(self.vector_mode in ('sync', 'async', 'subproc'))
+		assert(env.spec is not None)
+
+		# Copies don't render, and stop their episodes like rollout does after max_timesteps_per_episode
+		max_episode_steps = self.max_timesteps_per_episode
+		if env.spec.max_episode_steps is not None:
+			max_episode_steps = min(max_episode_steps, env.spec.max_episode_steps)
+		kwargs = {k: v for k, v in env.spec.kwargs.items() if k != 'render_mode'}
+		env_fns = [partial(gym.make, env.spec.id, max_episode_steps=max_episode_steps, **kwargs) for _ in range(self.num_envs)]
+
+		# Our own worker pool, where each subprocess can own several envs
+		if self.vector_mode == 'subproc':
+			return EnvWorkerPool(env_fns, self.obs_dim, self.act_dim, self.num_workers)
+
+		# Reset finished envs in the same step, so every returned obs belongs to the next timestep
+		vec_class = gym.vector.SyncVectorEnv if self.vector_mode == 'sync' else gym.vector.AsyncVectorEnv
+		return vec_class(env_fns, autoreset_mode=gym.vector.AutoresetMode.SAME_STEP)
+
+	def compute_returns(self):
 		"""
-		# The rewards-to-go (rtg) per episode per batch to return.
-		# The shape will be (num timesteps per episode)
-		batch_rtgs = []
+			Compute the lambda-returns of the batch in self.buffer from its rewards and values,
+			using Generalized Advantage Estimation.
 
-		# Iterate through each episode
-		for ep_rews in reversed(batch_rews):
+			Parameters:
+				None
 
-			discounted_reward = 0 # The discounted reward so far
+			Return:
+				batch_rtgs - the GAE advantages plus the values of each timestep, Shape: (number of timesteps in batch)
+		"""
+		flat = lambda array: self.buffer.flat(array).numpy()
+		values = flat(self.buffer.values)
 
-			# Iterate through all rewards in the episode. We go backwards for smoother calculation of each
-			# discounted return (think about why it would be harder starting from the beginning)
-			for rew in reversed(ep_rews):
-				discounted_reward = rew + discounted_reward * self.gamma
-				batch_rtgs.insert(0, discounted_reward)
+		# The advantages of every episode in the batch, computed at once
+		A = compute_gae(flat(self.buffer.rews), values, flat(self.buffer.bootstrap_values),
+						flat(self.buffer.dones), self.gamma, self.gae_lambda)
 
-		# Convert the rewards-to-go into a tensor
-		batch_rtgs = torch.tensor(batch_rtgs, dtype=torch.float)
+		# Convert the lambda-returns into a tensor
+		batch_rtgs = torch.tensor(A + values, dtype=torch.float)
 
 		return batch_rtgs
 
+	def _value(self, obs):
+		"""
+			Query the critic for the value of observations, without tracking gradients.
+
+			Parameters:
+				obs - the observations to evaluate
+
+			Return:
+				V - the value of each observation, as a numpy array
+		"""
+		with torch.inference_mode():
+			return self.rollout_policy.critic(obs).squeeze(-1).numpy()
+
 	def get_action(self, obs):
 		"""
 			Queries an action from the actor network, should be called from rollout.
@@ -271,22 +585,29 @@ class PPO:
 				action - the action to take, as a numpy array
 				log_prob - the log probability of the selected action in the distribution
 		"""
-		# Query the actor network for a mean action
-		mean = self.actor(obs)
-
-		# Create a distribution with the mean action and std from the covariance matrix above.
-		# For more information on how this distribution works, check out Andrew Ng's lecture on it:
-		# https://www.youtube.com/watch?v=JjB58InuTqM
-		dist = MultivariateNormal(mean, self.cov_mat)
-
-		# Sample an action from the distribution
-		action = dist.sample()
-
-		# Calculate the log probability for that action
-		log_prob = dist.log_prob(action)
+		# Nothing computed here is backpropagated through, so don't let autograd record it
+		with torch.inference_mode():
+			# Copy the observation into the preallocated tensor, converting it to float32 on the way.
+			# It only needs to be reallocated if called with a different number of observations
+			if self.obs_tensor.shape != obs.shape:
+				self.obs_tensor = torch.zeros(obs.shape)
+			obs = self.obs_tensor.copy_(torch.from_numpy(obs))
+
+			# Query the actor network for a mean action
+			mean = self.rollout_policy.actor(obs)
+
+			# Sample an action from a Gaussian around the mean action. Its covariance matrix is diagonal,
+			# so each dimension is sampled on its own with the std from log_std.
+			# For more information on how this distribution works, check out Andrew Ng's lecture on it:
+			# https://www.youtube.com/watch?v=JjB58InuTqM
+			log_std = self.rollout_policy.log_std
+			action = mean + torch.randn_like(mean) * log_std.exp()
+
+			# Calculate the log probability for that action
+			log_prob = self._log_prob(mean, action, log_std)
 
 		# Return the sampled action and the log probability of that action in our distribution
-		return action.detach().numpy(), log_prob.detach()
+		return action.numpy(), log_prob
 
 	def evaluate(self, batch_obs, batch_acts):
 		"""
@@ -304,19 +625,34 @@ class PPO:
 				V - the predicted values of batch_obs
 				log_probs - the log probabilities of the actions taken in batch_acts given batch_obs
 		"""
-		# Query critic network for a value V for each batch_obs. Shape of V should be same as batch_rtgs
-		V = self.critic(batch_obs).squeeze()
+		# Query critic network for a value V for each batch_obs, and the actor network for the mean
+		# action of each. Shape of V should be same as batch_rtgs
+		mean, V = self.policy(batch_obs)
 
 		# Calculate the log probabilities of batch actions using most recent actor network.
 		# This segment of code is similar to that in get_action()
-		mean = self.actor(batch_obs)
-		dist = MultivariateNormal(mean, self.cov_mat)
-		log_probs = dist.log_prob(batch_acts)
+		log_probs = self._log_prob(mean, batch_acts, self.policy.log_std)
 
 		# Return the value vector V of each observation in the batch
 		# and log probabilities log_probs of each action in the batch
 		return V, log_probs
 
+	def _log_prob(self, mean, actions, log_std):
+		"""
+			Log probability of actions under the diagonal Gaussian policy. With a diagonal covariance
+			matrix this is a sum over the action dimensions, so no matrix has to be factorized.
+
+			Parameters:
+				mean - the mean actions from the actor. Shape: (..., dimension of action)
+				actions - the actions to evaluate. Shape: (..., dimension of action)
+				log_std - the log standard deviation of each action dimension. Shape: (dimension of action)
+
+			Return:
+				log_probs - the log probability of each action. Shape: (...)
+		"""
+		z = (actions - mean) * torch.exp(-log_std)
+		return -0.5 * (z ** 2).sum(-1) - log_std.sum() - 0.5 * self.act_dim * np.log(2 * np.pi)
+
 	def _init_hyperparameters(self, hyperparameters):
 		"""
 			Initialize default and custom values for hyperparameters
@@ -335,7 +671,10 @@ class PPO:
 		self.n_updates_per_iteration = 5                # Number of times to update actor/critic per iteration
 		self.lr = 0.005                                 # Learning rate of actor optimizer
 		self.gamma = 0.95                               # Discount factor to be applied when calculating Rewards-To-Go
+		self.gae_lambda = 0.95                          # Lambda of Generalized Advantage Estimation, 1 gives Monte Carlo returns
 		self.clip = 0.2                                 # Recommended 0.2, helps define the threshold to clip the ratio during SGA
+		self.minibatch_size = None                      # Number of timesteps per gradient step, None to use the whole batch
+		self.learn_std = False                          # If the std of the actions is trained, rather than fixed at sqrt(0.5)
 
 		# Miscellaneous parameters
 		self.render = True                              # If we should render during rollout
@@ -343,9 +682,16 @@ class PPO:
 		self.save_freq = 10                             # How often we save in number of iterations
 		self.seed = None                                # Sets the seed of our program, used for reproducibility of results
 
+		# Vectorized rollout parameters
+		self.num_envs = 1                               # Number of envs stepped in lockstep during rollout
+		self.vector_mode = None                         # None to step self.env on its own, 'sync' or 'async' for a gymnasium vector env,
+		                                                # 'subproc' for an EnvWorkerPool
+		self.num_workers = None                         # Number of subprocesses for 'subproc', None for one per CPU core
+		self.max_policy_lag = 0                         # If > 0, collect batches in the background with weights up to this many iterations old
+
 		# Change any default values to custom values for specified hyperparameters
 		for param, val in hyperparameters.items():
-			exec('self.' + param + ' = ' + str(val))
+			setattr(self, param, val)
 
 		# Sets the seed if specified
 		if self.seed != None:
@@ -376,8 +722,9 @@ class PPO:
 
 		t_so_far = self.logger['t_so_far']
 		i_so_far = self.logger['i_so_far']
-		avg_ep_lens = np.mean(self.logger['batch_lens'])
-		avg_ep_rews = np.mean([np.sum(ep_rews) for ep_rews in self.logger['batch_rews']])
+		# With a vector env, a batch may end before any episode does
+		avg_ep_lens = np.mean(self.logger['batch_lens']) if len(self.logger['batch_lens']) > 0 else float('nan')
+		avg_ep_rews = np.mean(self.logger['batch_rews']) if len(self.logger['batch_rews']) > 0 else float('nan')
 		avg_actor_loss = np.mean([losses.float().mean() for losses in self.logger['actor_losses']])
 
 		# Round decimal places for more aesthetic logging messages
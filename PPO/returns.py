@@ -0,0 +1,69 @@
+"""
+	This file contains vectorized helpers to compute discounted returns
+	over a flat batch of timesteps made of several episodes.
+"""
+
+import numpy as np
+from scipy.signal import lfilter
+
+def discount_cumsum(x, dones, gamma):
+	"""
+		Compute the discounted sum of x from each timestep to the end of its episode,
+		out[t] = x[t] + gamma * out[t + 1], restarting after every timestep where dones is set.
+
+		Parameters:
+			x - the values to discount, e.g. rewards. Shape: (number of timesteps)
+			dones - nonzero at the last timestep of each episode. The last timestep of the
+					batch always ends an episode. Shape: (number of timesteps)
+			gamma - the discount factor
+
+		Return:
+			out - the discounted sums as float64. Shape: (number of timesteps)
+	"""
+	x = np.asarray(x, dtype=np.float64)
+	n = len(x)
+	t = np.arange(n)
+
+	# Discounted sums running straight through episode boundaries, computed in C by a linear filter
+	# over the reversed sequence: y[t] = x[t] + gamma * y[t + 1]
+	y = lfilter([1], [1, -gamma], x[::-1])[::-1]
+
+	# The last timestep of the episode that each timestep belongs to
+	ends = np.flatnonzero(dones)
+	if len(ends) == 0 or ends[-1] != n - 1:
+		ends = np.append(ends, n - 1)
+	ep_end = ends[np.searchsorted(ends, t)]
+
+	# Remove what leaked in from the following episodes, which is the discounted sum
+	# starting right after the end of the episode
+	y_next = np.append(y, 0)[ep_end + 1]
+	return y - gamma ** (ep_end - t + 1) * y_next
+
+def compute_gae(rews, values, bootstrap_values, dones, gamma, gae_lambda):
+	"""
+		Compute Generalized Advantage Estimates for a flat batch of timesteps in one backward pass.
+
+		Parameters:
+			rews - the rewards received. Shape: (number of timesteps)
+			values - the critic's value of each observation. Shape: (number of timesteps)
+			bootstrap_values - at the last timestep of an episode that was truncated rather than
+					terminated, the critic's value of the observation that followed it; 0 elsewhere.
+					Shape: (number of timesteps)
+			dones - nonzero at the last timestep of each episode. Shape: (number of timesteps)
+			gamma - the discount factor
+			gae_lambda - the GAE lambda, trading off bias (0) against variance (1)
+
+		Return:
+			advantages - the advantage of each timestep as float64. Shape: (number of timesteps)
+	"""
+	values = np.asarray(values, dtype=np.float64)
+	dones = np.asarray(dones, dtype=bool)
+
+	# Value of the next observation: the next stored one inside an episode, the bootstrapped
+	# one at its end (which is 0 when the episode really terminated)
+	next_values = np.append(values[1:], 0)
+	next_values = np.where(dones, bootstrap_values, next_values)
+
+	# TD residuals, discounted by gamma * lambda within each episode
+	deltas = rews + gamma * next_values - values
+	return discount_cumsum(deltas, dones, gamma * gae_lambda)
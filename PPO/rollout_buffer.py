@@ -0,0 +1,88 @@
+"""
+	This file contains the buffer that PPO fills with the timesteps
+	collected during a rollout.
+"""
+
+import numpy as np
+import torch
+
+class RolloutBuffer:
+	"""
+		Fixed-size float32 storage for a batch of timesteps from one or more envs.
+		Arrays are laid out as (n_envs, n_steps, ...), so the timesteps of each env
+		stay contiguous and flattening them into a batch never copies.
+	"""
+	def __init__(self, n_steps, n_envs, obs_dim, act_dim):
+		"""
+			Preallocate the arrays of the buffer.
+
+			Parameters:
+				n_steps - max number of timesteps stored per env
+				n_envs - number of envs stepped in lockstep
+				obs_dim - dimension of an observation
+				act_dim - dimension of an action
+
+			Return:
+				None
+		"""
+		self.n_steps = n_steps
+		self.n_envs = n_envs
+
+		self.obs = np.zeros((n_envs, n_steps, obs_dim), dtype=np.float32)
+		self.acts = np.zeros((n_envs, n_steps, act_dim), dtype=np.float32)
+		self.log_probs = np.zeros((n_envs, n_steps), dtype=np.float32)
+		self.rews = np.zeros((n_envs, n_steps), dtype=np.float32)
+		self.dones = np.zeros((n_envs, n_steps), dtype=np.float32)      # 1 where an episode ended at that timestep
+		self.values = np.zeros((n_envs, n_steps), dtype=np.float32)     # critic's estimate of each observation
+		self.bootstrap_values = np.zeros((n_envs, n_steps), dtype=np.float32)   # critic's estimate of the obs after an episode was cut short
+
+		self.ptr = 0 # Number of timesteps stored per env so far
+		self.ep_rets = [] # Returns of the episodes in the buffer, filled in by PPO once it's full
+
+	def reset(self):
+		"""
+			Empty the buffer so it can be filled with a new batch. Arrays are reused as is.
+
+			Parameters:
+				None
+
+			Return:
+				None
+		"""
+		self.ptr = 0
+		self.dones.fill(0)
+		self.bootstrap_values.fill(0)
+
+	def add(self, obs, act, log_prob, rew, done):
+		"""
+			Store one timestep of every env in place.
+
+			Parameters:
+				obs - the observations the actions were taken from. Shape: (n_envs, obs_dim)
+				act - the actions taken. Shape: (n_envs, act_dim)
+				log_prob - the log probabilities of the actions taken. Shape: (n_envs)
+				rew - the rewards received. Shape: (n_envs)
+				done - whether each episode ended on this timestep. Shape: (n_envs)
+
+			Return:
+				None
+		"""
+		self.obs[:, self.ptr] = obs
+		self.acts[:, self.ptr] = act
+		self.log_probs[:, self.ptr] = log_prob
+		self.rews[:, self.ptr] = rew
+		self.dones[:, self.ptr] = done
+		self.ptr += 1
+
+	def flat(self, array):
+		"""
+			Expose the filled part of one of the buffer arrays as a tensor sharing its memory.
+
+			Parameters:
+				array - one of the arrays of this buffer, e.g. self.obs
+
+			Return:
+				tensor - the stored timesteps of every env, one after another.
+						Shape: (n_envs * ptr, ...)
+		"""
+		return torch.from_numpy(array[:, :self.ptr].reshape(-1, *array.shape[2:]))
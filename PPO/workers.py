@@ -0,0 +1,206 @@
+"""
+	This file contains a pool of subprocess workers that step copies of an environment
+	in parallel, for PPO to collect its rollouts across all CPU cores.
+"""
+
+import multiprocessing as mp
+import os
+
+import numpy as np
+
+def _shared_array(ctype, dtype, shape):
+	"""
+		Allocate an array in shared memory that child processes can map as well.
+
+		Parameters:
+			ctype - the ctypes typecode of the elements, e.g. 'f'
+			dtype - the matching numpy dtype
+			shape - the shape of the array
+
+		Return:
+			raw - the shared memory block, to hand to the child processes
+			array - a numpy view of raw
+	"""
+	raw = mp.RawArray(ctype, int(np.prod(shape)))
+	return raw, np.frombuffer(raw, dtype=dtype).reshape(shape)
+
+def _worker(conn, env_fns, start, raws, obs_dim, act_dim, n_envs):
+	"""
+		The loop run by each worker process. It owns the envs with indices start to
+		start + len(env_fns) and waits for commands from the pool over conn. Actions are read
+		from, and results written to, the shared arrays of the pool. Envs whose episode ends
+		are reset in the same step, with their last observation saved in final_obs.
+
+		Parameters:
+			conn - the worker's end of the pipe to the pool
+			env_fns - functions creating the envs owned by this worker
+			start - index of the first env of this worker in the shared arrays
+			raws - the shared memory blocks of the pool, see EnvWorkerPool
+			obs_dim - dimension of an observation
+			act_dim - dimension of an action
+			n_envs - number of envs in the whole pool
+
+		Return:
+			None
+	"""
+	obs, acts, rews, terminated, truncated, final_obs = [
+		np.frombuffer(raw, dtype=dtype).reshape(shape) for raw, (dtype, shape) in zip(raws, [
+			(np.float32, (n_envs, obs_dim)),
+			(np.float32, (n_envs, act_dim)),
+			(np.float32, (n_envs,)),
+			(np.bool_, (n_envs,)),
+			(np.bool_, (n_envs,)),
+			(np.float32, (n_envs, obs_dim)),
+		])
+	]
+	envs = [env_fn() for env_fn in env_fns]
+
+	try:
+		while True:
+			cmd = conn.recv()
+			if cmd == 'reset':
+				for i, env in enumerate(envs, start):
+					obs[i], _ = env.reset()
+			elif cmd == 'step':
+				for i, env in enumerate(envs, start):
+					next_obs, rews[i], terminated[i], truncated[i], _ = env.step(acts[i])
+					if terminated[i] or truncated[i]:
+						final_obs[i] = next_obs
+						next_obs, _ = env.reset()
+					obs[i] = next_obs
+			elif cmd == 'close':
+				break
+			conn.send(None)
+	except Exception as e:
+		# Let the pool raise the error in the trainer process instead of hanging on recv
+		conn.send(e)
+	finally:
+		for env in envs:
+			env.close()
+		conn.close()
+
+class EnvWorkerPool:
+	"""
+		Steps num_envs envs spread over worker subprocesses, each owning one or more of them.
+		Observations, actions and step results go through shared memory, and the pipes to the
+		workers only carry commands. It follows the interface of a gymnasium vector env
+		resetting envs in the same step, so PPO can use it in place of one.
+	"""
+	def __init__(self, env_fns, obs_dim, act_dim, num_workers=None):
+		"""
+			Allocate the shared arrays and start the workers.
+
+			Parameters:
+				env_fns - picklable functions creating each env, e.g. functools.partial(gym.make, ...)
+				obs_dim - dimension of an observation
+				act_dim - dimension of an action
+				num_workers - number of worker processes, defaults to one per CPU core (at most one per env)
+
+			Return:
+				None
+		"""
+		self.num_envs = len(env_fns)
+		if num_workers is None:
+			num_workers = os.cpu_count()
+		num_workers = max(1, min(num_workers, self.num_envs))
+
+		shapes = [
+			('f', np.float32, (self.num_envs, obs_dim)),    # observations returned to the trainer
+			('f', np.float32, (self.num_envs, act_dim)),    # actions sent to the workers
+			('f', np.float32, (self.num_envs,)),            # rewards
+			('b', np.bool_, (self.num_envs,)),              # terminated
+			('b', np.bool_, (self.num_envs,)),              # truncated
+			('f', np.float32, (self.num_envs, obs_dim)),    # last observation of the episodes that just ended
+		]
+		raws, arrays = zip(*[_shared_array(*shape) for shape in shapes])
+		self.obs, self.acts, self.rews, self.terminated, self.truncated, self.final_obs = arrays
+
+		# Split the envs between the workers as evenly as possible
+		bounds = np.linspace(0, self.num_envs, num_workers + 1).astype(int)
+		self.conns = []
+		self.processes = []
+		self.closed = False
+		for start, end in zip(bounds[:-1], bounds[1:]):
+			conn, worker_conn = mp.Pipe()
+			process = mp.Process(target=_worker, args=(worker_conn, env_fns[start:end], start, raws, obs_dim, act_dim, self.num_envs), daemon=True)
+			process.start()
+			worker_conn.close()
+			self.conns.append(conn)
+			self.processes.append(process)
+
+	def _send(self, cmd):
+		"""
+			Send a command to every worker and wait until all of them are done with it.
+
+			Parameters:
+				cmd - the command, 'reset' or 'step'
+
+			Return:
+				None
+		"""
+		for conn in self.conns:
+			conn.send(cmd)
+		for conn in self.conns:
+			error = conn.recv()
+			if error is not None:
+				raise error
+
+	def reset(self):
+		"""
+			Reset all the envs.
+
+			Parameters:
+				None
+
+			Return:
+				obs - the first observation of every env. Shape: (num_envs, obs_dim)
+				info - an empty dict
+		"""
+		self._send('reset')
+		return self.obs.copy(), {}
+
+	def step(self, actions):
+		"""
+			Step every env with its action, resetting those whose episode ends.
+
+			Parameters:
+				actions - the action of each env. Shape: (num_envs, act_dim)
+
+			Return:
+				obs - the next observation of every env, already the first of a new episode for envs that were reset
+				rews - the reward of every env
+				terminated - whether each episode terminated
+				truncated - whether each episode was truncated
+				info - for envs whose episode ended, 'final_obs' holds their last observation and '_final_obs' marks them
+		"""
+		np.copyto(self.acts, actions.reshape(self.acts.shape))
+		self._send('step')
+
+		# Copy the results out, since the next step overwrites the shared arrays
+		done = self.terminated | self.truncated
+		info = {'final_obs': self.final_obs.copy(), '_final_obs': done} if done.any() else {}
+		return self.obs.copy(), self.rews.copy(), self.terminated.copy(), self.truncated.copy(), info
+
+	def close(self):
+		"""
+			Stop the workers and close their envs.
+
+			Parameters:
+				None
+
+			Return:
+				None
+		"""
+		if self.closed:
+			return
+		for conn in self.conns:
+			try:
+				conn.send('close')
+			except (BrokenPipeError, EOFError):
+				pass
+		for process in self.processes:
+			process.join()
+		self.closed = True
+
+	def __del__(self):
+		self.close()
@@ -0,0 +1,160 @@
+ROWS = 6
+COLS = 7
+COL_BITS = ROWS + 1  # one spare bit on top of each column, so shifts never wrap into the next one
+
+# Shifts between neighbouring cells: vertical, horizontal, diagonal /, diagonal \
+DIRECTIONS = (1, COL_BITS, COL_BITS + 1, COL_BITS - 1)
+
+# Bottom cell of every column
+BOTTOM = sum(1 << (col * COL_BITS) for col in range(COLS))
+
+# Every cell of the board, without the spare bits
+FULL = BOTTOM * ((1 << ROWS) - 1)
+
+# All the bits of the first column, spare bit included
+COLUMN = (1 << COL_BITS) - 1
+
+
+def cell_bit(row, col):
+    """
+    Bit of the cell at the given row of the observation (0 is the top) and column.
+    """
+    return 1 << (col * COL_BITS + ROWS - 1 - row)
+
+
+def has_four(board):
+    """
+    Check if a bitboard contains four in a row in any direction.
+    """
+    for shift in DIRECTIONS:
+        pairs = board & (board >> shift)
+        if pairs & (pairs >> 2 * shift):
+            return True
+    return False
+
+
+def four_through(board, bit):
+    """
+    Check if a bitboard contains four in a row going through the given cell.
+    """
+    for shift in DIRECTIONS:
+        pairs = board & (board >> shift)
+        starts = pairs & (pairs >> 2 * shift)  # lowest cell of every four in a row
+        if starts & (bit | bit >> shift | bit >> 2 * shift | bit >> 3 * shift):
+            return True
+    return False
+
+
+def mirror(bits):
+    """
+    Mirror a bitboard left to right. Also works on position keys, which never carry from one
+    column into the next.
+    """
+    return sum(((bits >> (col * COL_BITS)) & COLUMN) << ((COLS - 1 - col) * COL_BITS) for col in range(COLS))
+
+
+def winning_cells(board, mask):
+    """
+    Empty cells that would complete a four in a row of the bitboard, whether they can be
+    played right away or not. mask holds the pieces of both players.
+    """
+    # Vertical: only the cell right above three stacked pieces
+    cells = (board << 1) & (board << 2) & (board << 3)
+    for shift in DIRECTIONS[1:]:
+        # The cell is at the end of three pieces, or fills the gap in a 2 + 1 or 1 + 2 line
+        pairs = (board << shift) & (board << 2 * shift)
+        cells |= pairs & (board << 3 * shift)
+        cells |= pairs & (board >> shift)
+        pairs = (board >> shift) & (board >> 2 * shift)
+        cells |= pairs & (board << shift)
+        cells |= pairs & (board >> 3 * shift)
+    return cells & (FULL ^ mask)
+
+
+class Position:
+    """
+    Connect Four position stored as one bitboard per player plus the height of each column.
+    Bit col * 7 + r is the cell r rows above the bottom of column col. Player 1 is stored in
+    boards[0] and player -1 in boards[1].
+    """
+    __slots__ = ('boards', 'heights')
+
+    def __init__(self, boards=(0, 0), heights=None):
+        self.boards = list(boards)
+        self.heights = list(heights) if heights is not None else [0] * COLS
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Build a position from a 6x7 observation array, with row 0 at the top.
+        """
+        position = cls()
+        for r in range(ROWS):
+            for c in range(COLS):
+                piece = board[r, c]
+                if piece == 1:
+                    position.boards[0] |= cell_bit(r, c)
+                elif piece == -1:
+                    position.boards[1] |= cell_bit(r, c)
+        for c in range(COLS):
+            position.heights[c] = sum(1 for r in range(ROWS) if board[r, c] != 0)
+        return position
+
+    def copy(self):
+        return Position(self.boards, self.heights)
+
+    def can_play(self, col):
+        return self.heights[col] < ROWS
+
+    def valid_moves(self):
+        return [c for c in range(COLS) if self.heights[c] < ROWS]
+
+    def play(self, col, player):
+        """
+        Drop a piece of the player in the column. Returns the bit of the cell it landed on.
+        """
+        bit = 1 << (col * COL_BITS + self.heights[col])
+        self.boards[player < 0] |= bit
+        self.heights[col] += 1
+        return bit
+
+    def undo(self, col, player):
+        """
+        Take back the last piece dropped in the column, which must belong to the player.
+        """
+        self.heights[col] -= 1
+        self.boards[player < 0] ^= 1 << (col * COL_BITS + self.heights[col])
+
+    def board(self, player):
+        return self.boards[player < 0]
+
+    def mask(self):
+        return self.boards[0] | self.boards[1]
+
+    def playable(self):
+        """
+        The cells a piece would land on in every column that isn't full.
+        """
+        return (self.mask() + BOTTOM) & FULL
+
+    def key(self):
+        """
+        Unique integer for the position: player 1's pieces plus the mask of all pieces plus
+        the bottom row. Adding the bottom row moves a bit above the top piece of each column,
+        so the mask can be read back from the key.
+        """
+        return self.boards[0] + (self.boards[0] | self.boards[1]) + BOTTOM
+
+    def to_grid(self):
+        """
+        Rows of the position as lists with 1, -1 and 0 for empty, laid out like the observation.
+        """
+        grid = [[0] * COLS for _ in range(ROWS)]
+        for r in range(ROWS):
+            for c in range(COLS):
+                bit = cell_bit(r, c)
+                if self.boards[0] & bit:
+                    grid[r][c] = 1
+                elif self.boards[1] & bit:
+                    grid[r][c] = -1
+        return grid
@@ -0,0 +1,157 @@
+import numpy as np
+
+from bitboard import ROWS, COLS, COL_BITS, BOTTOM, FULL, Position, winning_cells
+
+# Every four cells in a row of the board, as bit indices of the cells. 69 in total.
+WINDOWS = [
+    tuple((c + i * dc) * COL_BITS + r + i * dr for i in range(4))
+    for dr, dc in ((1, 0), (0, 1), (1, 1), (-1, 1))  # vertical, horizontal, diagonal /, diagonal \
+    for c in range(COLS)
+    for r in range(ROWS)
+    if 0 <= c + 3 * dc < COLS and 0 <= r + 3 * dr < ROWS
+]
+
+# Windows that go through each cell, by bit index
+CELL_WINDOWS = [[] for _ in range(COLS * COL_BITS)]
+for w, window in enumerate(WINDOWS):
+    for index in window:
+        CELL_WINDOWS[index].append(w)
+
+
+def _window_score(own, opponent):
+    """
+    Score of a window for a player with own of its pieces in it, while the opponent has opponent.
+    """
+    empty = 4 - own - opponent
+    if own == 4:
+        return 1000  # Winning line
+    elif own == 3 and empty == 1:
+        return 15  # Threat: 3 in a row
+    elif own == 2 and empty == 2:
+        return 7  # Potential: 2 in a row
+    elif opponent == 3 and empty == 1:
+        return -20  # Block opponent's threat
+    return 0
+
+
+# The state of a window is n1 * 5 + n2 for n1 pieces of player 1 and n2 of player -1 in it.
+# A window is scored once for every piece in it, for player 1 and against player -1.
+WINDOW_SCORES = [0] * 25
+for n1 in range(5):
+    for n2 in range(5 - n1):
+        WINDOW_SCORES[n1 * 5 + n2] = (n1 + n2) * (_window_score(n1, n2) - _window_score(n2, n1))
+
+WINDOW_SCORE_ARRAY = np.array(WINDOW_SCORES)
+
+# The windows again, as indices of their cells in a flattened 6x7 observation (row 0 at the top)
+WINDOW_CELLS = np.array([[(ROWS - 1 - index % COL_BITS) * COLS + index // COL_BITS for index in window]
+                         for window in WINDOWS])
+
+# Bit of each cell of a flattened observation in a bitboard, and the cells of each column
+CELL_BITS = np.array([1 << (i % COLS * COL_BITS + ROWS - 1 - i // COLS) for i in range(ROWS * COLS)], dtype=np.uint64)
+COLUMN_MASKS = [np.uint64(((1 << ROWS) - 1) << (col * COL_BITS)) for col in range(COLS)]
+
+CENTER_CELLS = np.arange(ROWS) * COLS + 3
+
+# How the score changes when a piece of player 1 (index 0) or player -1 (index 1) enters a window
+STEPS = (5, 1)
+SCORE_DELTAS = tuple(
+    [WINDOW_SCORES[state + step] - WINDOW_SCORES[state] if state + step < 25 else 0 for state in range(25)]
+    for step in STEPS
+)
+
+
+class EvaluatedPosition(Position):
+    """
+    Position that keeps the pieces of each player in every window, and the sum of the window
+    scores for player 1, up to date as moves are played and undone.
+    """
+    __slots__ = ('windows', 'score')
+
+    def __init__(self, boards=(0, 0), heights=None):
+        super().__init__(boards, heights)
+        self.windows = [0] * len(WINDOWS)
+        self.score = 0
+        for index in range(COLS * COL_BITS):
+            for player, board in enumerate(self.boards):
+                if board >> index & 1:
+                    self._add(index, player)
+
+    @classmethod
+    def from_board(cls, board):
+        position = Position.from_board(board)
+        return cls(position.boards, position.heights)
+
+    def copy(self):
+        position = EvaluatedPosition.__new__(EvaluatedPosition)
+        position.boards = list(self.boards)
+        position.heights = list(self.heights)
+        position.windows = list(self.windows)
+        position.score = self.score
+        return position
+
+    def _add(self, index, player):
+        """
+        Count a new piece of the player (0 for player 1, 1 for player -1) at the bit index.
+        """
+        windows = self.windows
+        deltas = SCORE_DELTAS[player]
+        step = STEPS[player]
+        for w in CELL_WINDOWS[index]:
+            self.score += deltas[windows[w]]
+            windows[w] += step
+
+    def play(self, col, player):
+        index = col * COL_BITS + self.heights[col]
+        self._add(index, player < 0)
+        return super().play(col, player)
+
+    def undo(self, col, player):
+        super().undo(col, player)
+        windows = self.windows
+        deltas = SCORE_DELTAS[player < 0]
+        step = STEPS[player < 0]
+        for w in CELL_WINDOWS[col * COL_BITS + self.heights[col]]:
+            windows[w] -= step
+            self.score -= deltas[windows[w]]
+
+
+def _fork_scores(cells, player):
+    """
+    Fork bonus of the player for each board of a batch, as MinimaxPlayer._detect_forks computes it,
+    on arrays of uint64 bitboards. cells are the flattened boards, shape (N, 42).
+    """
+    board = np.where(cells == player, CELL_BITS, 0).sum(axis=1, dtype=np.uint64)
+    mask = np.where(cells != 0, CELL_BITS, 0).sum(axis=1, dtype=np.uint64)
+    playable = (mask + BOTTOM) & FULL
+    scores = np.zeros(len(cells), dtype=np.int64)
+    for column in COLUMN_MASKS:
+        bit = playable & column  # 0 where the column is full
+        threats = winning_cells(board | bit, mask | bit) & (playable ^ bit | (bit << 1) & FULL)
+        scores += 50 * ((bit != 0) & (threats & (threats - 1) != 0))
+    return scores
+
+
+def position_array(position):
+    """
+    The position as a 6x7 observation, with 1, -1 and 0 for empty and row 0 at the top.
+    """
+    cells = (np.uint64(position.boards[0]) & CELL_BITS != 0).astype(np.int64)
+    cells -= np.uint64(position.boards[1]) & CELL_BITS != 0
+    return cells.reshape(ROWS, COLS)
+
+
+def evaluate_boards(boards):
+    """
+    Score a stack of 6x7 observations (row 0 at the top) at once, with the same heuristic as
+    MinimaxPlayer._evaluate_board, from the point of view of player 1. Returns an int64 array
+    of N scores for boards of shape (N, 6, 7).
+    """
+    cells = np.asarray(boards).reshape(-1, ROWS * COLS)
+    window_cells = cells[:, WINDOW_CELLS]
+    n1 = (window_cells == 1).sum(axis=2)
+    n2 = (window_cells == -1).sum(axis=2)
+    scores = WINDOW_SCORE_ARRAY[n1 * 5 + n2].sum(axis=1)
+    scores += 4 * (cells[:, CENTER_CELLS] == 1).sum(axis=1)
+    scores += _fork_scores(cells, 1) - _fork_scores(cells, -1)
+    return scores
@@ -0,0 +1,138 @@
+import argparse
+import os
+from time import perf_counter
+
+import numpy as np
+
+from bitboard import COLS, Position, four_through, mirror
+
+# One entry of the book: canonical position key, best move and its score for the player to move
+BOOK_DTYPE = np.dtype([('key', '<u8'), ('move', 'i1'), ('score', '<f4')])
+
+
+def canonical_key(position):
+    """
+    Key of the position or of its mirror image, whichever is smaller, and whether it is the mirror's.
+    Both share one entry in the book, with the move of the mirror flipped.
+    """
+    key = position.key()
+    mirrored = mirror(key)
+    if mirrored < key:
+        return mirrored, True
+    return key, False
+
+
+class OpeningBook:
+    """
+    Table of precomputed moves for early positions, stored on disk as a .npy array of BOOK_DTYPE
+    sorted by key. The file is memory mapped on the first lookup, so only the pages that
+    are looked up are read.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.entries = None
+
+    def _load(self):
+        if self.entries is None:
+            self.entries = np.load(self.path, mmap_mode='r')
+        return self.entries
+
+    def __len__(self):
+        return len(self._load())
+
+    def lookup(self, position):
+        """
+        Return the book move and score for the position, with player 1 to move, or None if it
+        isn't in the book.
+        """
+        entries = self._load()
+        key, mirrored = canonical_key(position)
+        i = np.searchsorted(entries['key'], key)
+        if i == len(entries) or entries['key'][i] != key:
+            return None
+        move = int(entries['move'][i])
+        return (COLS - 1 - move if mirrored else move), float(entries['score'][i])
+
+    def __getstate__(self):
+        # Memory maps don't pickle, the copy maps the file again when it is used
+        state = self.__dict__.copy()
+        state['entries'] = None
+        return state
+
+
+def opening_positions(max_plies):
+    """
+    Yield every position with at most max_plies pieces in which the game isn't over, from the
+    point of view of the player to move (player 1). Mirror images are only yielded once, as
+    the one whose key is the canonical key.
+    """
+    seen = set()
+
+    def expand(position, plies, player):
+        if plies == 0:
+            # The player who moved first is -1 when the number of pieces is odd
+            if player == 1:
+                key, mirrored = canonical_key(position)
+                if key not in seen:
+                    seen.add(key)
+                    if mirrored:
+                        yield Position([mirror(board) for board in position.boards], position.heights[::-1])
+                    else:
+                        yield position.copy()
+            return
+        for move in position.valid_moves():
+            bit = position.play(move, player)
+            if not four_through(position.board(player), bit):
+                yield from expand(position, plies - 1, -player)
+            position.undo(move, player)
+
+    for plies in range(max_plies + 1):
+        yield from expand(Position(), plies, 1 if plies % 2 == 0 else -1)
+
+
+def build_book(player, max_plies, verbose=True):
+    """
+    Search every opening position with up to max_plies pieces with the player, and return
+    the book entries as a sorted array of BOOK_DTYPE.
+    """
+    from evaluation import EvaluatedPosition
+
+    rows = []
+    start = perf_counter()
+    for position in opening_positions(max_plies):
+        key = position.key()
+        if player.heuristic:
+            position = EvaluatedPosition(position.boards, position.heights)
+        player.tt.new_search()
+        score, move = player._search_root(position, player.max_depth)
+        rows.append((key, move, score))
+        if verbose and len(rows) % 100 == 0:
+            print(f"{len(rows)} positions searched in {perf_counter() - start:.1f}s", flush=True)
+    entries = np.array(rows, dtype=BOOK_DTYPE)
+    entries.sort(order='key')
+    return entries
+
+
+def main(args):
+    """
+    Build an opening book with a MinimaxPlayer and save it to args.output.
+    """
+    from try4 import MinimaxPlayer
+
+    player = MinimaxPlayer(max_depth=args.depth, heuristic=not args.simple, n_jobs=args.n_jobs)
+    try:
+        entries = build_book(player, args.max_plies)
+    finally:
+        player.close()
+    np.save(args.output, entries)
+    print(f"Saved {len(entries)} positions to {args.output} ({os.path.getsize(args.output)} bytes)", flush=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build an opening book for MinimaxPlayer")
+    parser.add_argument('--max_plies', type=int, default=4, help="book positions with up to this many pieces")
+    parser.add_argument('--depth', type=int, default=8, help="search depth of each book position")
+    parser.add_argument('--simple', action='store_true', help="search with the simple evaluation")
+    parser.add_argument('--n_jobs', type=int, default=1, help="worker processes of the search")
+    parser.add_argument('--output', default='opening_book.npy')
+    main(parser.parse_args())
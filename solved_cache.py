@@ -0,0 +1,98 @@
+import os
+import tempfile
+
+import numpy as np
+
+# Fibonacci hashing multiplier, spreads consecutive keys over the whole table
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+MASK64 = (1 << 64) - 1
+
+# Layout of the data word of a slot
+MOVE_BITS = 0x7  # best move + 1, so an empty slot has no move
+WIN = 0x8  # set when the player to move wins, clear when they lose
+
+
+class SolvedCache:
+    """
+    Hash table on disk of positions whose game-theoretic value the search has proven: the
+    player to move wins or loses whatever the opponent does. It is memory mapped, so several
+    processes (e.g. the workers of a parallel MinimaxPlayer) can share it through the same file.
+
+    Each slot is two 64-bit words, key ^ data and data, written without locks. A reader only
+    trusts a slot whose words xor back to the key it probes, so a slot torn by two processes
+    writing at once reads as a miss, never as a wrong value.
+    """
+    def __init__(self, path, size=2 ** 20):
+        """
+        path is the file of the table, created empty if it doesn't exist. size is the number
+        of slots, a power of two, and must match the size of an existing file.
+        """
+        if size & (size - 1):
+            raise ValueError(f"The size must be a power of two, got {size}")
+        self.path = path
+        self.size = size
+        self.shift = 64 - (size.bit_length() - 1)
+        self.slots = None
+
+    def _create(self):
+        """
+        Create the file of an empty table unless it exists. The file is sized under a temporary
+        name and then linked to the path, which fails if another process created it first, so
+        the path only ever shows a complete file and an existing table is never truncated.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.path) + '.')
+        try:
+            os.ftruncate(fd, self.size * 16)
+            os.close(fd)
+            os.link(tmp_path, self.path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp_path)
+
+    def _open(self):
+        if self.slots is None:
+            if not os.path.exists(self.path):
+                self._create()
+            if os.path.getsize(self.path) != self.size * 16:
+                raise ValueError(f"{self.path} doesn't hold a table of {self.size} slots")
+            self.slots = np.memmap(self.path, dtype='<u8', mode='r+', shape=(self.size * 2,))
+        return self.slots
+
+    def _index(self, key):
+        return 2 * (((key * HASH_MULTIPLIER) & MASK64) >> self.shift)
+
+    def probe(self, key):
+        """
+        Return (value, best_move) if the position is solved, with value inf when the player
+        to move wins and -inf when they lose, or None.
+        """
+        slots = self._open()
+        i = self._index(key)
+        data = int(slots[i + 1])
+        if int(slots[i]) ^ data != key or not data & MOVE_BITS:
+            return None
+        value = float('inf') if data & WIN else float('-inf')
+        return value, (data & MOVE_BITS) - 1
+
+    def store(self, key, value, best_move):
+        """
+        Record that the position is won (value inf) or lost (value -inf) for the player to move,
+        replacing whatever was in its slot.
+        """
+        slots = self._open()
+        i = self._index(key)
+        data = (best_move + 1) | (WIN if value > 0 else 0)
+        slots[i + 1] = data
+        slots[i] = key ^ data
+
+    def flush(self):
+        if self.slots is not None:
+            self.slots.flush()
+
+    def __getstate__(self):
+        # Memory maps don't pickle, the copy maps the file again when it is used
+        state = self.__dict__.copy()
+        state['slots'] = None
+        return state
@@ -0,0 +1,170 @@
+import random
+
+import numpy as np
+import pytest
+
+from bitboard import ROWS, COLS
+from evaluation import EvaluatedPosition, evaluate_boards
+
+DIRECTIONS = [(1, 0), (0, 1), (1, 1), (1, -1)]
+
+
+def random_board(rng, n_pieces):
+    """
+    6x7 observation after n_pieces random moves, alternating between 1 and -1.
+    """
+    board = np.zeros((ROWS, COLS), dtype=np.int64)
+    player = 1
+    for _ in range(n_pieces):
+        cols = [c for c in range(COLS) if board[0, c] == 0]
+        if not cols:
+            break
+        c = rng.choice(cols)
+        r = max(r for r in range(ROWS) if board[r, c] == 0)
+        board[r, c] = player
+        player = -player
+    return board
+
+
+def random_boards(seed, n):
+    rng = random.Random(seed)
+    return [random_board(rng, rng.randrange(0, ROWS * COLS + 1)) for _ in range(n)]
+
+
+def reference_windows(board):
+    """
+    The window part of the heuristic, rescanning the whole board: every occupied cell scores the
+    four-cell windows through it, in every direction, for player 1 and against player -1.
+    """
+    def evaluate_line(line, player):
+        score = 0
+        for i in range(len(line) - 3):
+            window = line[i:i + 4]
+            if window.count(player) == 4:
+                score += 1000
+            elif window.count(player) == 3 and window.count(0) == 1:
+                score += 15
+            elif window.count(player) == 2 and window.count(0) == 2:
+                score += 7
+            elif window.count(-player) == 3 and window.count(0) == 1:
+                score -= 20
+        return score
+
+    score = 0
+    for row in range(ROWS):
+        for col in range(COLS):
+            if board[row, col] == 0:
+                continue
+            for dr, dc in DIRECTIONS:
+                line = []
+                for step in range(-3, 4):
+                    r, c = row + step * dr, col + step * dc
+                    line.append(int(board[r, c]) if 0 <= r < ROWS and 0 <= c < COLS else None)
+                score += evaluate_line(line, 1) - evaluate_line(line, -1)
+    return score
+
+
+def reference_center(board):
+    return 4 * int((board[:, 3] == 1).sum())
+
+
+def drop(board, col, player):
+    """
+    Copy of the board with a piece of the player dropped in the column, and the row it landed on.
+    """
+    board = board.copy()
+    row = max(r for r in range(ROWS) if board[r, col] == 0)
+    board[row, col] = player
+    return board, row
+
+
+def wins_through(board, row, col):
+    player = board[row, col]
+    for dr, dc in DIRECTIONS:
+        count = 1
+        for sign in (1, -1):
+            r, c = row + sign * dr, col + sign * dc
+            while 0 <= r < ROWS and 0 <= c < COLS and board[r, c] == player:
+                count += 1
+                r, c = r + sign * dr, c + sign * dc
+        if count >= 4:
+            return True
+    return False
+
+
+def reference_forks(board, player):
+    """
+    50 for every move after which the player has more than one winning move.
+    """
+    score = 0
+    for col in range(COLS):
+        if board[0, col] != 0:
+            continue
+        after, _ = drop(board, col, player)
+        winning_moves = 0
+        for move in range(COLS):
+            if after[0, move] != 0:
+                continue
+            won, row = drop(after, move, player)
+            winning_moves += wins_through(won, row, move)
+        if winning_moves > 1:
+            score += 50
+    return score
+
+
+def reference_evaluate(board):
+    return (reference_windows(board) + reference_center(board)
+            + reference_forks(board, 1) - reference_forks(board, -1))
+
+
+@pytest.mark.parametrize('board', random_boards(0, 200))
+def test_window_score_matches_rescan(board):
+    assert EvaluatedPosition.from_board(board).score == reference_windows(board)
+
+
+@pytest.mark.parametrize('board', random_boards(1, 50))
+def test_score_unchanged_after_play_and_undo(board):
+    rng = random.Random(int(np.abs(board).sum()))
+    position = EvaluatedPosition.from_board(board)
+    score, windows = position.score, list(position.windows)
+
+    moves = []
+    player = 1
+    for _ in range(rng.randrange(1, 10)):
+        valid_moves = position.valid_moves()
+        if not valid_moves:
+            break
+        col = rng.choice(valid_moves)
+        position.play(col, player)
+        moves.append((col, player))
+        # Playing keeps the score of the new position up to date
+        assert position.score == EvaluatedPosition(position.boards, position.heights).score
+        player = -player
+
+    for col, player in reversed(moves):
+        position.undo(col, player)
+    assert position.score == score
+    assert position.windows == windows
+
+
+def test_copy_is_independent():
+    position = EvaluatedPosition.from_board(random_boards(2, 1)[0])
+    copy = position.copy()
+    col = copy.valid_moves()[0]
+    copy.play(col, 1)
+    assert position.score == EvaluatedPosition(position.boards, position.heights).score
+    assert copy.score == EvaluatedPosition(copy.boards, copy.heights).score
+
+
+def test_evaluate_boards_matches_reference():
+    boards = random_boards(3, 200)
+    expected = [reference_evaluate(board) for board in boards]
+    assert evaluate_boards(np.stack(boards)).tolist() == expected
+
+
+def test_minimax_evaluate_board_matches_reference():
+    try4 = pytest.importorskip('try4')
+    player = try4.MinimaxPlayer()
+    for board in random_boards(4, 200):
+        position = EvaluatedPosition.from_board(board)
+        assert player._evaluate_board(position) == reference_evaluate(board)
@@ -0,0 +1,57 @@
+EXACT = 0  # the stored value is the exact minimax value
+LOWER = 1  # the search failed high, the value is at least the stored one
+UPPER = 2  # the search failed low, the value is at most the stored one
+
+# Fibonacci hashing multiplier. Keys are raw bitboards whose low bits only depend on the first
+# columns, so they are mixed before picking a slot
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+MASK64 = (1 << 64) - 1
+
+
+class TranspositionTable:
+    """
+    Fixed-size hash table of searched positions. Each slot holds one entry
+    (key, depth, bound, value, best_move, generation), in the slot the hash of the key maps to.
+    """
+    def __init__(self, size=2 ** 20, replacement='depth'):
+        """
+        size is the number of slots. replacement is 'depth' to keep the deeper of two
+        entries of the current search competing for a slot, or 'always' to keep the newest.
+        """
+        if replacement not in ('depth', 'always'):
+            raise ValueError(f"Unknown replacement policy {replacement!r}")
+        self.size = size
+        self.replacement = replacement
+        self.slots = [None] * size
+        self.generation = 0
+
+    def new_search(self):
+        """
+        Mark the start of a new search. Entries of earlier searches stay usable, but are
+        always replaced when their slot is needed.
+        """
+        self.generation += 1
+
+    def clear(self):
+        self.slots = [None] * self.size
+        self.generation = 0
+
+    def _index(self, key):
+        # Scale the 64-bit hash to the table, which works for any size
+        return ((key * HASH_MULTIPLIER) & MASK64) * self.size >> 64
+
+    def probe(self, key):
+        """
+        Return the entry stored for the key, or None.
+        """
+        entry = self.slots[self._index(key)]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, depth, bound, value, best_move):
+        index = self._index(key)
+        entry = self.slots[index]
+        if (entry is None or self.replacement == 'always' or entry[0] == key
+                or entry[5] != self.generation or depth >= entry[1]):
+            self.slots[index] = (key, depth, bound, value, best_move, self.generation)
@@ -2,7 +2,13 @@ import numpy as np
 from connect_four_gymnasium import ConnectFourEnv
 from connect_four_gymnasium.players import ConsolePlayer, BabyPlayer, ChildPlayer, TeenagerPlayer, AdultPlayer, AdultSmarterPlayer
 from connect_four_gymnasium.tools import EloLeaderboard
-from time import sleep
+from time import sleep, perf_counter
+from concurrent.futures import ProcessPoolExecutor
+from bitboard import Position, four_through, winning_cells, COL_BITS, ROWS, FULL
+from evaluation import EvaluatedPosition, evaluate_boards, position_array
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+from opening_book import OpeningBook
+from solved_cache import SolvedCache
 
 
 class Player:
@@ -21,17 +27,67 @@ class Player:
     def isDeterministic(self):
         raise NotImplementedError("The 'isDeterministic' method must be implemented in the child class")
 
+# Columns from the center outwards, which is the best static move order in Connect Four
+CENTER_ORDER = (3, 2, 4, 1, 5, 0, 6)
+CENTER_COLUMN = ((1 << ROWS) - 1) << (3 * COL_BITS)
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside the search when the time budget of the move runs out.
+    """
+
+
 class MinimaxPlayer(Player):
-    def __init__(self, name="MinimaxPlayer", max_depth=4, heuristic=True):
+    def __init__(self, name="MinimaxPlayer", max_depth=4, heuristic=True, tt_size=2 ** 20, tt_replacement='depth',
+                 time_budget_ms=None, move_ordering=True, batch_eval=False, n_jobs=1, opening_book=None,
+                 solved_cache=None):
         super().__init__(name)
         self.heuristic = heuristic
         self.max_depth = max_depth
+        # With a time budget, search deeper and deeper until it runs out (or max_depth is reached)
+        self.time_budget_ms = time_budget_ms
+        self.deadline = None
+        # Kept across moves, so positions searched for one move are reused for the next. It only
+        # ever cuts the search with a value of the same depth, which any search of the position
+        # would find too, and the root ignores it, so it makes searches faster without changing
+        # the move chosen for an observation
+        self.tt = TranspositionTable(tt_size, tt_replacement)
+        # Killer moves and history scores order the moves when move_ordering is set, otherwise
+        # they are searched left to right (after the transposition table move)
+        self.move_ordering = move_ordering
+        self.killers = [[None, None] for _ in range(43)]  # two killers per number of pieces on the board
+        self.history = [0] * 7
+        # Score all the children of depth-1 nodes with one batch evaluation (heuristic only)
+        self.batch_eval = batch_eval
+        # With n_jobs > 1, the root moves after the first one are searched in parallel processes
+        self.n_jobs = n_jobs
+        self._executor = None
+        # Moves of positions in the book are played without searching, see opening_book.py
+        if isinstance(opening_book, str):
+            opening_book = OpeningBook(opening_book)
+        self.opening_book = opening_book
+        # Won and lost positions proven by the search are kept on disk and reused by every
+        # search, game and worker process, see solved_cache.py
+        if isinstance(solved_cache, str):
+            solved_cache = SolvedCache(solved_cache)
+        self.solved_cache = solved_cache
+        # Counters of the search, to compare the pruning of different settings on the same positions
+        self.stats = {'tt_hits': 0, 'tt_misses': 0, 'nodes': 0, 'cutoffs': 0, 'first_move_cutoffs': 0,
+                      're_searches': 0, 'book_hits': 0,
+                      'solved_hits': 0}
+
+    def reset_stats(self):
+        for k in self.stats:
+            self.stats[k] = 0
 
     def play(self, obs):
         """
         Choose the best action for the current state.
         """
         if isinstance(obs, list):
+            if self.max_depth == 1 and self.heuristic:
+                return self._batch_decisions(obs)
             return [self._minimax_decision(o) for o in obs]
         else:
             return self._minimax_decision(obs)
@@ -40,176 +96,360 @@ class MinimaxPlayer(Player):
         """
         Use the minimax algorithm with alpha-beta pruning to select the best move.
         """
-        _, best_move = self._minimax(observation, self.max_depth, True, float('-inf'), float('inf'))
+        # The heuristic reads the window scores kept by EvaluatedPosition as moves are played
+        position_class = EvaluatedPosition if self.heuristic else Position
+        position = position_class.from_board(observation)
+        if self.opening_book is not None:
+            entry = self.opening_book.lookup(position)
+            if entry is not None:
+                self.stats['book_hits'] += 1
+                return entry[0]
+        self.tt.new_search()
+        # Start every decision with empty killers and history, so the move doesn't depend on
+        # what the player searched for earlier moves
+        self.killers = [[None, None] for _ in range(43)]
+        self.history = [0] * 7
+        if self.time_budget_ms is None:
+            _, best_move = self._search_root(position, self.max_depth)
+            return best_move
+        return self._iterative_deepening(position)
+
+    def _iterative_deepening(self, position):
+        """
+        Search to depth 1, 2, ... until the time budget runs out or max_depth is reached, and
+        return the best move of the deepest search that completed. Below the root, each search
+        starts with the best moves of the previous one, which the transposition table hands back.
+        """
+        start = perf_counter()
+        best_move = None
+        for depth in range(1, self.max_depth + 1):
+            # Depth 1 always completes, so there is a move to return
+            self.deadline = start + self.time_budget_ms / 1000 if depth > 1 else None
+            try:
+                score, best_move = self._search_root(position, depth)
+            except SearchTimeout:
+                # The interrupted search left moves on the position, but it isn't used again
+                break
+            finally:
+                self.deadline = None
+            # A forced win or loss won't change with more depth
+            if score in (float('inf'), float('-inf')):
+                break
         return best_move
 
-    def _minimax(self, board, depth, maximizing_player, alpha, beta):
+    def _root_order(self, position):
+        """
+        The moves of the root in a fixed order, center first (left to right without move_ordering).
+        Root moves are searched in this order and a move only replaces the best one with a strictly
+        higher score, so ties go to the first one whatever the search ordered below the root.
+        """
+        order = CENTER_ORDER if self.move_ordering else range(7)
+        return [c for c in order if position.can_play(c)]
+
+    def _search_root(self, position, depth):
+        """
+        Search the position to the given depth, in parallel if n_jobs > 1. Returns the score and the best move.
+        """
+        moves = self._root_order(position)
+        if depth == 0 or not moves:
+            return self._negamax(position, depth, 1, float('-inf'), float('inf'))
+
+        # Win right away when possible, rather than with the first move that forces a longer win
+        for move in moves:
+            bit = position.play(move, 1)
+            won = four_through(position.board(1), bit)
+            position.undo(move, 1)
+            if won:
+                return float('inf'), move
+
+        if self.n_jobs > 1:
+            return self._parallel_root(position, depth, moves)
+
+        self.stats['nodes'] += 1
+        best_eval = float('-inf')
+        best_move = moves[0]
+        for i, move in enumerate(moves):
+            position.play(move, 1)
+            if i == 0 or best_eval == float('-inf'):
+                eval_score = -self._negamax(position, depth - 1, -1, float('-inf'), -best_eval)[0]
+            else:
+                # Only prove that the move is no better than the best one so far, as in _negamax
+                eval_score = -self._negamax(position, depth - 1, -1, -best_eval - 1, -best_eval)[0]
+                if eval_score > best_eval:
+                    self.stats['re_searches'] += 1
+                    eval_score = -self._negamax(position, depth - 1, -1, float('-inf'), -eval_score)[0]
+            position.undo(move, 1)
+            if eval_score > best_eval:
+                best_eval = eval_score
+                best_move = move
+            if best_eval == float('inf'):
+                break
+        return best_eval, best_move
+
+    def _parallel_root(self, position, depth, moves):
+        """
+        Search the first root move here to get a score to beat, then the other root moves in
+        the worker processes, each with that same bound and a fresh player. The results don't
+        depend on which worker searches which move or when it finishes, and are merged in the
+        order of moves, the root order, so the chosen move is the one the serial search chooses.
+        """
+        position.play(moves[0], 1)
+        best_eval = -self._negamax(position, depth - 1, -1, float('-inf'), float('inf'))[0]
+        position.undo(moves[0], 1)
+        best_move = moves[0]
+
+        if best_eval < float('inf') and len(moves) > 1:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.n_jobs)
+            settings = {'max_depth': self.max_depth, 'heuristic': self.heuristic, 'tt_size': self.tt.size,
+                        'tt_replacement': self.tt.replacement, 'move_ordering': self.move_ordering,
+                        'batch_eval': self.batch_eval, 'solved_cache': self.solved_cache}
+            futures = [self._executor.submit(_search_root_move, settings, position.boards, position.heights,
+                                             move, depth, best_eval, self.deadline)
+                       for move in moves[1:]]
+            try:
+                for move, future in zip(moves[1:], futures):
+                    # A score at most the one to beat is only a bound, but that move isn't chosen anyway
+                    eval_score, stats = future.result()
+                    for k in stats:
+                        self.stats[k] += stats[k]
+                    if eval_score > best_eval:
+                        best_eval = eval_score
+                        best_move = move
+            finally:
+                for future in futures:
+                    future.cancel()
+
+        return best_eval, best_move
+
+    def close(self):
+        """
+        Stop the worker processes of the parallel search, if any were started.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __getstate__(self):
+        # The worker processes stay with the original player
+        state = self.__dict__.copy()
+        state['_executor'] = None
+        return state
+
+    def _order_moves(self, position, tt_move):
+        """
+        Order the moves of the position for the search: the transposition table move, then the
+        killer moves of this ply, then the rest by history score, center columns first on ties.
         """
-        Perform the minimax algorithm with alpha-beta pruning.
+        moves = [c for c in CENTER_ORDER if position.can_play(c)]
+        if not self.move_ordering:
+            moves.sort()
+            if tt_move is not None:
+                moves.remove(tt_move)
+                moves.insert(0, tt_move)
+            return moves
+
+        # Sorting is stable, so columns with the same history stay in center-first order
+        history = self.history
+        moves.sort(key=lambda c: -history[c])
+        front = [tt_move] if tt_move is not None else []
+        for killer in self.killers[sum(position.heights)]:
+            if killer is not None and killer not in front and position.can_play(killer):
+                front.append(killer)
+        return front + [c for c in moves if c not in front]
+
+    def _negamax(self, position, depth, color, alpha, beta):
         """
-        valid_moves = [c for c in range(7) if board[0, c] == 0]
-        #print(valid_moves)
+        Perform the negamax algorithm with alpha-beta pruning and principal variation search.
+        Scores are from the point of view of the player to move, color (1 or -1).
+        Moves are applied to the position and undone once searched.
+        """
+        if self.deadline is not None and perf_counter() > self.deadline:
+            raise SearchTimeout()
+        self.stats['nodes'] += 1
+
+        # Reuse what an earlier search of the same position found, if it searched at least as deep
+        key = position.key() * 2 + (color == 1)
+        entry = self.tt.probe(key)
+        tt_move = None
+        if entry is None:
+            self.stats['tt_misses'] += 1
+        else:
+            self.stats['tt_hits'] += 1
+            _, entry_depth, bound, value, tt_move, _ = entry
+            # A deeper entry, e.g. left by a search from an earlier root, would return a value
+            # a fresh search of this depth can't find
+            if entry_depth == depth:
+                if bound == EXACT:
+                    return value, tt_move
+                elif bound == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if beta <= alpha:
+                    return value, tt_move
+
+        valid_moves = position.valid_moves()
         if depth == 0 or not valid_moves:
             if self.heuristic:
-                return self._evaluate_board(board), valid_moves[0] if valid_moves else None
+                score = color * self._evaluate_board(position)
             else:
-                return self._simple_evaluate_board(board), valid_moves[0] if valid_moves else None
-
-
-        if maximizing_player:
-            max_eval = float('-inf')
-            best_move = None
-            for move in valid_moves:
-                new_board, row, col = self._apply_move(board, move, 1)
-                if self._check_win(new_board, 1, row, col):
-                    return float('inf'), move
-                eval_score, _ = self._minimax(new_board, depth - 1, False, alpha, beta)
-                if eval_score > max_eval:
-                    max_eval = eval_score
-                    best_move = move
-                alpha = max(alpha, eval_score)
-                if beta <= alpha:
-                    break
-            if best_move is None:
-                best_move = valid_moves[0]
-            return max_eval, best_move
+                score = color * self._simple_evaluate_board(position)
+            best_move = valid_moves[0] if valid_moves else None
+            self.tt.store(key, depth, EXACT, score, best_move)
+            return score, best_move
+
+        # A proven win or loss holds whatever the depth
+        if self.solved_cache is not None:
+            solved = self.solved_cache.probe(key)
+            if solved is not None:
+                self.stats['solved_hits'] += 1
+                return solved
+
+        alpha_start = alpha
+        moves = self._order_moves(position, tt_move)
+        if depth == 1 and self.batch_eval and self.heuristic:
+            best_eval, best_move = self._evaluate_children(position, color, moves)
+            self.tt.store(key, depth, EXACT, best_eval, best_move)
+            return best_eval, best_move
+        best_eval = float('-inf')
+        best_move = moves[0]
+        for i, move in enumerate(moves):
+            bit = position.play(move, color)
+            if four_through(position.board(color), bit):
+                position.undo(move, color)
+                self.tt.store(key, depth, EXACT, float('inf'), move)
+                return float('inf'), move
+            if i == 0 or alpha == float('-inf'):
+                eval_score = -self._negamax(position, depth - 1, -color, -beta, -alpha)[0]
+            else:
+                # Only prove that the move is no better than the best one so far, and search it
+                # again with the full window if it turns out to be better
+                eval_score = -self._negamax(position, depth - 1, -color, -alpha - 1, -alpha)[0]
+                if alpha < eval_score < beta:
+                    self.stats['re_searches'] += 1
+                    eval_score = -self._negamax(position, depth - 1, -color, -beta, -eval_score)[0]
+            position.undo(move, color)
+            if eval_score > best_eval:
+                best_eval = eval_score
+                best_move = move
+            alpha = max(alpha, eval_score)
+            if alpha >= beta:
+                self.stats['cutoffs'] += 1
+                if i == 0:
+                    self.stats['first_move_cutoffs'] += 1
+                # Remember the refutation for sibling positions and for later searches
+                killers = self.killers[sum(position.heights)]
+                if move != killers[0]:
+                    killers[1] = killers[0]
+                    killers[0] = move
+                self.history[move] += depth * depth
+                break
+
+        if best_eval <= alpha_start:
+            bound = UPPER
+        elif best_eval >= beta:
+            bound = LOWER
         else:
-            min_eval = float('inf')
-            best_move = None
-            for move in valid_moves:
-                new_board, row, col = self._apply_move(board, move, -1)
-                if self._check_win(new_board, -1, row, col):
-                    return float('-inf'), move
-                eval_score, _ = self._minimax(new_board, depth - 1, True, alpha, beta)
-                if eval_score < min_eval:
-                    min_eval = eval_score
-                    best_move = move
-                beta = min(beta, eval_score)
-                if beta <= alpha:
+            bound = EXACT
+        self.tt.store(key, depth, bound, best_eval, best_move)
+        # Heuristic scores are finite, so an infinite one is proven even if it is only a bound.
+        # Immediate wins returned above aren't stored, they are found again in a few moves.
+        if self.solved_cache is not None and best_eval in (float('inf'), float('-inf')):
+            self.solved_cache.store(key, best_eval, best_move)
+        return best_eval, best_move
+
+    def _evaluate_children(self, position, color, moves):
+        """
+        Search a depth-1 node by playing each move and scoring all the resulting boards with a
+        single call to evaluate_boards. Returns the best score and move, the first one on ties.
+        """
+        for move in moves:
+            bit = position.play(move, color)
+            won = four_through(position.board(color), bit)
+            position.undo(move, color)
+            if won:
+                return float('inf'), move
+
+        children = np.repeat(position_array(position)[None], len(moves), axis=0)
+        rows = [ROWS - 1 - position.heights[move] for move in moves]
+        children[np.arange(len(moves)), rows, moves] = color
+        scores = color * evaluate_boards(children)
+        self.stats['nodes'] += len(moves)
+        best = int(np.argmax(scores))
+        return int(scores[best]), moves[best]
+
+    def _batch_decisions(self, observations):
+        """
+        Choose the moves of depth-1 searches of many observations, with a single batch evaluation
+        of the boards after every move of every observation. Winning moves are played right away,
+        and ties go to the first move of _root_order, as in the search.
+        """
+        decisions = [None] * len(observations)
+        children, owners, child_moves = [], [], []
+        for i, observation in enumerate(observations):
+            position = Position.from_board(observation)
+            moves = self._root_order(position)
+            for move in moves:
+                bit = position.play(move, 1)
+                won = four_through(position.board(1), bit)
+                position.undo(move, 1)
+                if won:
+                    decisions[i] = move
                     break
-            if best_move is None:
-                best_move = valid_moves[0]
-            return min_eval, best_move
-
-    def _evaluate_board(self, board):
+            if decisions[i] is not None:
+                continue
+            for move in moves:
+                child = np.array(observation)
+                child[ROWS - 1 - position.heights[move], move] = 1
+                children.append(child)
+                owners.append(i)
+                child_moves.append(move)
+
+        if children:
+            best_scores = {}
+            for i, move, score in zip(owners, child_moves, evaluate_boards(np.stack(children))):
+                if i not in best_scores or score > best_scores[i]:
+                    best_scores[i] = score
+                    decisions[i] = move
+        return decisions
+
+    def _evaluate_board(self, position):
         """
         Evaluate the board state using a multi-faceted heuristic.
+        The score of all the four-cell windows is kept up to date by the position itself.
         """
-        score = 0
+        score = position.score
 
         # Positional weights (favor the center columns)
-        center_array = [board[i, 3] for i in range(6)]
-        center_count = center_array.count(1)
+        center_count = bin(position.board(1) & CENTER_COLUMN).count('1')
         score += center_count * 4  # Strong emphasis on center control
 
-        # Evaluate all potential lines
-        for r in range(6):
-            for c in range(7):
-                if board[r, c] == 0:
-                    continue
-                score += self._score_position(board, r, c, 1)  # Evaluate for player
-                score -= self._score_position(board, r, c, -1)  # Evaluate for opponent
-
         # Additional heuristics for forks and blocks
-        score += self._detect_forks(board, 1)  # Fork creation for the player
-        score -= self._detect_forks(board, -1)  # Fork prevention for the opponent
+        score += self._detect_forks(position, 1)  # Fork creation for the player
+        score -= self._detect_forks(position, -1)  # Fork prevention for the opponent
 
         return score
 
-    def _detect_forks(self, board, player):
+    def _detect_forks(self, position, player):
         """
         Detect positions where the player can create a fork (multiple winning moves).
+        Counts the moves after which the player has more than one playable winning cell.
         """
+        board = position.board(player)
+        mask = position.mask()
+        playable = position.playable()
         fork_score = 0
-        for r in range(6):
-            for c in range(7):
-                if board[r, c] == 0:  # Check empty positions
-                    simulated_board, row, col = self._apply_move(board, c, player)
-                    winning_moves = 0
-                    for move in range(7):
-                        if simulated_board[0, move] == 0:
-                            test_board, test_row, test_col = self._apply_move(simulated_board, move, player)
-                            if self._check_win(test_board, player, test_row, test_col):
-                                winning_moves += 1
-                    if winning_moves > 1:  # Fork detected
-                        fork_score += 50  # Prioritize forks heavily
+        moves = playable
+        while moves:
+            bit = moves & -moves
+            moves ^= bit
+            # After the move, its cell is taken and the one above it becomes playable
+            threats = winning_cells(board | bit, mask | bit) & (playable ^ bit | (bit << 1) & FULL)
+            if threats & (threats - 1):  # Fork detected
+                fork_score += 50  # Prioritize forks heavily
         return fork_score
 
-    def _score_position(self, board, row, col, player):
-        """
-        Score a specific position based on advanced patterns.
-        """
-        directions = [
-            (1, 0),  # vertical
-            (0, 1),  # horizontal
-            (1, 1),  # diagonal /
-            (1, -1)  # diagonal \
-        ]
-        score = 0
-        for dr, dc in directions:
-            line = []
-            for step in range(-3, 4):
-                r, c = row + step * dr, col + step * dc
-                if 0 <= r < 6 and 0 <= c < 7:
-                    line.append(board[r, c])
-                else:
-                    line.append(None)  # Out-of-bounds placeholder
-            score += self._evaluate_line(line, player)
-        return score
-
-    def _evaluate_line(self, line, player):
-        """
-        Evaluate a line of 7 positions for advanced scoring.
-        """
-        score = 0
-        for i in range(len(line) - 3):
-            window = line[i:i + 4]
-            if window.count(player) == 4:
-                score += 1000  # Winning line
-            elif window.count(player) == 3 and window.count(0) == 1:
-                score += 15  # Threat: 3 in a row
-            elif window.count(player) == 2 and window.count(0) == 2:
-                score += 7  # Potential: 2 in a row
-            elif window.count(-player) == 3 and window.count(0) == 1:
-                score -= 20  # Block opponent's threat
-        return score
-
-
-
-    def _apply_move(self, board, move, player):
-        """
-        Apply a move to the board for the specified player.
-        """
-        new_board = board.copy()
-        for i in range(5, -1, -1):
-            if new_board[i, move] == 0:
-                new_board[i, move] = player
-                return new_board, i, move
-        raise ValueError("Invalid move applied to a full column")
-
-    def _check_win(self, board, player, row, col):
-        """
-        Check if the specified player has won given the last move.
-        """
-        directions = [
-            (1, 0),  # horizontal
-            (0, 1),  # vertical
-            (1, 1),  # diagonal /
-            (1, -1)  # diagonal \
-        ]
-
-        for dr, dc in directions:
-            count = 0
-            for step in range(-3, 4):
-                r, c = row + step * dr, col + step * dc
-                if 0 <= r < 6 and 0 <= c < 7 and board[r, c] == player:
-                    count += 1
-                    if count == 4:
-                        return True
-                else:
-                    count = 0
-        return False
-
     def getElo(self):
         """
         Estimated Elo rating for this player.
@@ -218,42 +458,57 @@ class MinimaxPlayer(Player):
 
     def isDeterministic(self):
         """
-        Minimax player is deterministic.
+        Minimax player is deterministic, unless a time budget decides how deep it searches or
+        positions solved in earlier games change what it finds.
         """
-        return True
+        return self.time_budget_ms is None and self.solved_cache is None
 
 
-    def _simple_evaluate_board(self, board):
+    def _simple_evaluate_board(self, position):
         """
         Evaluate the board state using a heuristic.
         """
         score = 0
-        for move in range(7):
-            if board[0, move] == 0:
-                new_board, row, col = self._apply_move(board, move, 1)
-                if self._check_win(new_board, 1, row, col):
-                    score += 100
-                elif self._check_win(new_board, -1, row, col):
-                    score -= 100
+        for move in position.valid_moves():
+            bit = position.play(move, 1)
+            if four_through(position.board(1), bit):
+                score += 100
+            position.undo(move, 1)
         return score
 
 
-# env = ConnectFourEnv(render_mode="human")
-# opponent = MinimaxPlayer(max_depth=4, heuristic=False)
-# env.change_opponent(opponent)
-you = MinimaxPlayer(max_depth=2, heuristic=True)
-
-
-# obs , _=  env.reset()
-# for i in range(5000):
-#     #sleep(0.5)
-#     action = you.play(obs)
-#     obs, rewards, dones, truncated,info = env.step(action)
-#     env.render()
-#     if(truncated or dones):
-#         sleep(20)
-#         obs , _=  env.reset()
-
-elo = EloLeaderboard()
-numero = elo.get_elo(you, parallel=True, num_matches=10)
-print(numero)
\ No newline at end of file
+def _search_root_move(settings, boards, heights, move, depth, alpha, deadline):
+    """
+    Search one root move in a worker process of a parallel MinimaxPlayer. A fresh player is
+    created for every move, so the result doesn't depend on what the worker searched before.
+    Returns the score of the move for the root player, or a bound at most alpha if it doesn't
+    beat alpha, and the counters of the search.
+    """
+    player = MinimaxPlayer(**settings)
+    player.deadline = deadline
+    position = (EvaluatedPosition if player.heuristic else Position)(boards, heights)
+    position.play(move, 1)
+    eval_score, _ = player._negamax(position, depth - 1, -1, float('-inf'), -alpha)
+    return -eval_score, player.stats
+
+
+if __name__ == '__main__':
+    # env = ConnectFourEnv(render_mode="human")
+    # opponent = MinimaxPlayer(max_depth=4, heuristic=False)
+    # env.change_opponent(opponent)
+    you = MinimaxPlayer(max_depth=2, heuristic=True)
+
+
+    # obs , _=  env.reset()
+    # for i in range(5000):
+    #     #sleep(0.5)
+    #     action = you.play(obs)
+    #     obs, rewards, dones, truncated,info = env.step(action)
+    #     env.render()
+    #     if(truncated or dones):
+    #         sleep(20)
+    #         obs , _=  env.reset()
+
+    elo = EloLeaderboard()
+    numero = elo.get_elo(you, parallel=True, num_matches=10)
+    print(numero)
\ No newline at end of file